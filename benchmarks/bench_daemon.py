@@ -0,0 +1,185 @@
+"""
+Measure the throughput and latency of `marry.py serve`.
+
+A server is started in a subprocess (unless `--url` points at a running one)
+and `--clients` threads each send `--requests` requests of `--sentences`
+sentences, drawn from a synthetic treebank (see `synthetic.py`). Latency is
+measured per request, from sending it to reading the reply. Run from the
+repository root:
+
+    PYTHONPATH=. python benchmarks/bench_daemon.py -l es --clients 8
+    PYTHONPATH=. python benchmarks/bench_daemon.py --socket /tmp/udc.sock
+"""
+
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from synthetic import write_dataset
+from ud_compatibility.languages import get_lang
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str) -> None:
+        super(UnixHTTPConnection, self).__init__("localhost")
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def connection(url: str) -> http.client.HTTPConnection:
+    if url.startswith("unix:"):
+        return UnixHTTPConnection(url[len("unix:") :])
+    parsed = urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port)
+
+
+def post(conn: http.client.HTTPConnection, body: bytes) -> Dict:
+    conn.request("POST", "/convert", body, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    reply = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(reply)
+    return reply
+
+
+def sentences(ud_file: Path) -> List[str]:
+    with open(ud_file, encoding="utf-8") as f:
+        return [s for s in f.read().split("\n\n") if s.strip()]
+
+
+@contextmanager
+def server(args, folder: Path) -> Iterator[str]:
+    """Start `marry.py serve` and yield its address."""
+    command = [sys.executable, "-m", "ud_compatibility.marry", "serve", "--port", "0"]
+    if args.socket:
+        command += ["--socket", str(args.socket)]
+    command += ["--max_wait_ms", str(args.max_wait_ms)]
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, universal_newlines=True, cwd=folder
+    )
+    try:
+        assert process.stdout is not None
+        for line in process.stdout:
+            if line.startswith("Serving on "):
+                break
+        else:
+            raise RuntimeError("the server did not start")
+        yield line[len("Serving on ") :].strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def client(
+    url: str,
+    bodies: List[bytes],
+    latencies: List[float],
+    errors: List[BaseException],
+) -> None:
+    conn = connection(url)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            post(conn, body)
+            latencies.append(time.perf_counter() - start)
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        conn.close()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(args, url: str, pool: List[str], language: str) -> None:
+    per_request = args.sentences
+    bodies = [
+        [
+            json.dumps(
+                {
+                    "language": language,
+                    "sentences": [
+                        pool[((c * args.requests + r) * per_request + i) % len(pool)]
+                        for i in range(per_request)
+                    ],
+                }
+            ).encode("utf-8")
+            for r in range(args.requests)
+        ]
+        for c in range(args.clients)
+    ]
+    conn = connection(url)
+    post(conn, bodies[0][0])  # Warm the translator up.
+    conn.close()
+
+    latencies: List[float] = []
+    errors: List[BaseException] = []
+    threads = [
+        threading.Thread(target=client, args=(url, b, latencies, errors))
+        for b in bodies
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    requests = len(latencies)
+    print(f"{requests} requests of {per_request} sentences from {args.clients} clients")
+    print(f"throughput\t{requests / elapsed:10,.0f} requests/s")
+    print(f"throughput\t{requests * per_request / elapsed:10,.0f} sentences/s")
+    for name, q in [("p50", 0.50), ("p90", 0.90), ("p99", 0.99)]:
+        print(f"latency {name}\t{percentile(latencies, q) * 1000:10.2f} ms")
+    print(f"latency mean\t{statistics.mean(latencies) * 1000:10.2f} ms")
+
+
+def main() -> None:
+    parser = ArgumentParser(__doc__)
+    parser.add_argument("-l", "--lang", default="es")
+    parser.add_argument("--url", help="a running server, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--socket", type=Path, help="start the server on this socket")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="per client")
+    parser.add_argument("--sentences", type=int, default=4, help="per request")
+    parser.add_argument("--tokens", type=int, default=20_000)
+    parser.add_argument("--max_wait_ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    language = get_lang(args.lang)
+    with tempfile.TemporaryDirectory() as tmp:
+        data = write_dataset(language, Path(tmp), args.tokens)
+        pool = sentences(data.ud_file)
+        url: Optional[str] = args.url
+        if url is not None:
+            run(args, url, pool, language.ud)
+            return
+        root = Path(__file__).resolve().parent.parent
+        os.environ["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(root), os.environ.get("PYTHONPATH")])
+        )
+        with server(args, Path(tmp)) as url:
+            run(args, url, pool, language.ud)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure the startup cost of `ud_compatibility`, for one or more source trees.
+
+Each run is a fresh interpreter that imports `ud_compatibility.marry`, then
+translates a single token, which builds whatever was deferred on import. The
+script reports the median import time, first-use time and whole-process time.
+The runs happen inside each tree's `ud_compatibility/` folder, so that older
+trees, which read `UD-UniMorph.tsv` from the working directory, work too. To
+compare against an earlier revision:
+
+    git worktree add /tmp/before <revision>
+    python benchmarks/bench_import.py . /tmp/before
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List
+
+CODE = """
+import json, time
+start = time.perf_counter()
+import ud_compatibility.marry
+imported = time.perf_counter()
+from ud_compatibility.translator import Translator
+from ud_compatibility.utils import CoNLLRow
+row = "1\\tcasas\\tcasa\\tNOUN\\t_\\tGender=Fem|Number=Plur\\t0\\troot\\t_\\t_"
+Translator(True, False).translate(CoNLLRow.make(row))
+used = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_use": used - imported}))
+"""
+
+
+def run_once(tree: Path) -> Dict[str, float]:
+    env = dict(os.environ, PYTHONPATH=str(tree))
+    start = time.perf_counter()
+    done = subprocess.run(
+        [sys.executable, "-c", CODE],
+        cwd=tree / "ud_compatibility",
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    elapsed = time.perf_counter() - start
+    timings = json.loads(done.stdout.splitlines()[-1])
+    timings["process"] = elapsed
+    timings["stdout_bytes"] = len(done.stdout)
+    return timings
+
+
+def main() -> None:
+    parser = ArgumentParser(__doc__)
+    parser.add_argument("trees", nargs="*", type=Path, default=[Path(".")])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'tree':30}\t{'import':>9}\t{'first use':>9}\t{'process':>9}\tstdout")
+    for tree in args.trees:
+        runs: List[Dict[str, float]] = [
+            run_once(tree.resolve()) for _ in range(args.repeat)
+        ]
+        median = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+        print(
+            f"{str(tree):30}"
+            f"\t{median['import'] * 1000:6.1f} ms"
+            f"\t{median['first_use'] * 1000:6.1f} ms"
+            f"\t{median['process'] * 1000:6.1f} ms"
+            f"\t{median['stdout_bytes']:.0f} B"
+        )
+
+
+if __name__ == "__main__":
+    main()
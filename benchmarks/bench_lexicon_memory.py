@@ -0,0 +1,56 @@
+"""
+Measure the memory held by a parsed UniMorph lexicon, per language.
+
+For each language, the old dict-of-sets representation and the interned
+`Lexicon` are built from the same file. The script reports the memory each
+one keeps alive, as traced by `tracemalloc`. Languages are resolved through
+`paths.py`, and UniMorph files can also be passed directly:
+
+    PYTHONPATH=. python benchmarks/bench_lexicon_memory.py -l fi la ru
+"""
+
+import gc
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from ud_compatibility.languages import get_lang
+from ud_compatibility.paths import um_filepath
+from ud_compatibility.um_reader import _as_dict_of_sets, _read_unimorph, load_lexicon
+
+
+def retained(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    parser = ArgumentParser(__doc__)
+    parser.add_argument("files", nargs="*", type=Path, help="UniMorph files")
+    parser.add_argument("-l", "--langs", nargs="+", default=[])
+    args = parser.parse_args()
+
+    files: List[Tuple[str, Path]] = [(f.name, f) for f in args.files]
+    for code in args.langs:
+        language = get_lang(code)
+        files.append((language.name, um_filepath(language)))
+
+    print(f"{'language':20}\t{'dict of sets':>12}\t{'Lexicon':>12}\t{'reduction':>9}")
+    for name, um_file in files:
+        before = retained(lambda: _as_dict_of_sets(_read_unimorph(um_file)))
+        after = retained(lambda: load_lexicon(um_file))
+        print(
+            f"{name:20}\t{before / 2**20:9.1f} MiB\t{after / 2**20:9.1f} MiB"
+            f"\t{before / (after or 1):8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Time the conversion and evaluation hot paths on synthetic data.
+
+For each language, a CoNLL-U file and a UniMorph lexicon are generated (see
+`synthetic.py`) and the following are timed, best of `--repeat`:
+
+    ud2um               the reference UD → UniMorph conversion, uncached
+    ud2um[compiled]     the compiled converter the translators use
+    translate[basic]    the language's Translator, from a cold cache
+    translate[clever]   the same, with its language-specific rules
+    unimorph            parsing the UniMorph file (entries per second)
+    convert             end-to-end conversion of the CoNLL-U file
+    evaluate            end-to-end evaluation, including the lexicon load
+
+Rates are in tokens per second. Results can be saved as JSON with `-o`, and
+`--compare` checks them against an earlier run. The exit status is 1 if any
+rate dropped by more than `--threshold`. Nothing is downloaded:
+
+    PYTHONPATH=. python benchmarks/bench_suite.py -l es pt -o base.json
+    PYTHONPATH=. python benchmarks/bench_suite.py -l es pt --compare base.json
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from synthetic import Dataset, write_dataset
+from ud_compatibility.converter import CompiledConverter
+from ud_compatibility.languages import get_lang, languages
+from ud_compatibility.marry import EvaluationInstance
+from ud_compatibility.translator import translator_class, ud2um
+from ud_compatibility.um_reader import unimorph
+from ud_compatibility.utils import (
+    CoNLLRow,
+    UdTag,
+    is_conll_useless,
+    ud2um_mapping,
+    ud_iterator,
+)
+
+Result = Dict[str, float]
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def benchmarks(data: Dataset, output: Path) -> Dict[str, Callable[[], object]]:
+    cls = translator_class(data.language)
+    lines = ud_iterator(data.ud_file)
+    records = [CoNLLRow.make(line) for line in lines if not is_conll_useless(line)]
+    tags = [f"{r.upostag}|{r.feats}" for r in records]
+    files = (data.um_file, [data.ud_file])
+
+    def reference() -> None:
+        for tag in tags:
+            ud2um(UdTag(tag))
+
+    def compiled() -> None:
+        convert = CompiledConverter(ud2um_mapping)
+        for tag in tags:
+            convert(tag)
+
+    def translate(clever: bool) -> Callable[[], None]:
+        def run() -> None:
+            translator = cls(clever, replace_feats=False)
+            for record in records:
+                translator.translate(record)
+
+        return run
+
+    def convert() -> None:
+        translators = [cls(True, replace_feats=True)]
+        instance = EvaluationInstance(
+            data.language, replace_feats=True, files=files, translators=translators
+        )
+        instance.convert_file(data.ud_file, output)
+
+    def evaluate() -> None:
+        translators = [cls(True, replace_feats=False)]
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            instance = EvaluationInstance(
+                data.language, files=files, lexicon_cache=None, translators=translators
+            )
+            instance._evaluate_all(data.ud_file)
+
+    return {
+        "ud2um": reference,
+        "ud2um[compiled]": compiled,
+        "translate[basic]": translate(False),
+        "translate[clever]": translate(True),
+        "unimorph": lambda: unimorph(data.um_file),
+        "convert": convert,
+        "evaluate": evaluate,
+    }
+
+
+def run(data: Dataset, folder: Path, repeat: int) -> Dict[str, Result]:
+    output = folder / data.ud_file.name.replace("-ud-", "-um-")
+    results = {}
+    for name, fn in benchmarks(data, output).items():
+        items = data.um_entries if name == "unimorph" else data.tokens
+        seconds = best_time(fn, repeat)
+        results[name] = {"seconds": seconds, "items": items, "rate": items / seconds}
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Result]],
+    previous: Dict[str, Dict[str, Result]],
+    threshold: float,
+) -> List[str]:
+    """Print each rate next to its earlier value; return the regressions."""
+    regressions = []
+    for language, benches in results.items():
+        for name, result in benches.items():
+            line = f"{language:20}\t{name:18}\t{result['rate']:14,.0f}/s"
+            before = previous.get(language, {}).get(name)
+            if before is not None:
+                change = result["rate"] / before["rate"] - 1
+                line += f"\t{change:+8.1%}"
+                if change < -threshold:
+                    line += "\tREGRESSION"
+                    regressions.append(f"{language} {name}")
+            print(line)
+    return regressions
+
+
+def main() -> None:
+    parser = ArgumentParser(__doc__)
+    parser.add_argument("-l", "--langs", nargs="+", help="default: every language")
+    parser.add_argument("--tokens", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", type=Path, help="keep the generated data here")
+    parser.add_argument("-o", "--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    languages_ = [get_lang(code) for code in args.langs] if args.langs else languages
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.data or Path(tmp)
+        for language in languages_:
+            data = write_dataset(language, folder, args.tokens, args.seed)
+            results[language.name] = run(data, folder, args.repeat)
+            regressions += compare(
+                {language.name: results[language.name]}, previous, args.threshold
+            )
+
+    if args.output:
+        meta = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tokens": args.tokens,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare the reference `ud2um` with the compiled single-pass converter.
+
+Both are run, uncached, over the same synthetic tags. The script first checks
+that they agree on every tag and then reports tags per second for each:
+
+    PYTHONPATH=. python benchmarks/bench_ud2um.py
+"""
+
+import random
+import timeit
+from argparse import ArgumentParser
+from typing import List
+
+from ud_compatibility.converter import CompiledConverter
+from ud_compatibility.translator import ud2um
+from ud_compatibility.utils import UdTag, ud2um_mapping
+
+
+def synthetic_tags(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    values = {}
+    upos = []
+    for ud in ud2um_mapping:
+        if "=" in ud:
+            feat, val = ud.split("=")
+            values.setdefault(feat, []).append(val)
+        else:
+            upos.append(ud)
+    feats = sorted(values)
+    tags = []
+    for _ in range(n):
+        parts = [
+            f"{feat}={rng.choice(values[feat])}"
+            for feat in sorted(rng.sample(feats, rng.randint(0, 6)))
+        ]
+        if rng.random() < 0.05:
+            parts.append(f"Number[psor]={rng.choice(['Sing', 'Plur'])}")
+        if rng.random() < 0.05:
+            parts.append(f"Person[{rng.choice(['erg', 'abs', 'dat'])}]=3")
+        tags.append("|".join([rng.choice(upos)] + (parts or ["_"])))
+    return tags
+
+
+def main() -> None:
+    parser = ArgumentParser(__doc__)
+    parser.add_argument("--tokens", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tags = synthetic_tags(args.tokens)
+    compiled = CompiledConverter(ud2um_mapping)
+    for tag in tags:
+        expected = sorted(ud2um(UdTag(tag)).split(";"))
+        assert sorted(compiled(tag).split(";")) == expected, tag
+
+    def reference() -> None:
+        for tag in tags:
+            ud2um(UdTag(tag))
+
+    def single_pass() -> None:
+        for tag in tags:
+            compiled(tag)
+
+    results = {}
+    for name, fn in [("ud2um", reference), ("compiled", single_pass)]:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"{name:10}\t{args.tokens / best:12,.0f} tags/s")
+    print(f"speedup   \t{results['ud2um'] / results['compiled']:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
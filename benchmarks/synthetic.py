@@ -0,0 +1,122 @@
+"""
+Synthetic CoNLL-U and UniMorph data for the benchmarks.
+
+Signatures are built from the features in `UD-UniMorph.tsv`, keeping only
+those the language's `Translator` accepts. Signatures and lemmas are both
+drawn with Zipfian frequencies, so that a few of each dominate running text
+as they do in real treebanks. Most forms keep the signature they were given
+first. The UniMorph file lists the conversion of most (form, lemma, signature)
+triples and perturbs the rest, so evaluation sees both hits and misses.
+"""
+
+import random
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from ud_compatibility.languages import LanguageCoding
+from ud_compatibility.translator import Translator, translator_class
+from ud_compatibility.utils import CoNLLRow, ud2um_mapping
+
+LETTERS = "aeioubcdfglmnprstv"
+# Endings that some `lgspec_modify` rules look at.
+SUFFIXES = ["", "", "", "s", "es", "a", "o", "do", "to", "ra", "ran", "ram"]
+
+Signature = Tuple[str, str]
+
+
+class Dataset(NamedTuple):
+    language: LanguageCoding
+    ud_file: Path
+    um_file: Path
+    tokens: int
+    um_entries: int
+
+
+def zipf_weights(n: int) -> List[float]:
+    return list(accumulate(1.0 / (rank + 1) for rank in range(n)))
+
+
+def row(id_: int, form: str, lemma: str, sig: Signature) -> str:
+    upos, feats = sig
+    return f"{id_}\t{form}\t{lemma}\t{upos}\t_\t{feats}\t0\troot\t_\t_"
+
+
+def signatures(translator: Translator, n: int, rng: random.Random) -> List[Signature]:
+    upos: List[str] = []
+    values: Dict[str, List[str]] = {}
+    for ud in ud2um_mapping:
+        if "=" in ud:
+            feat, val = ud.split("=")
+            values.setdefault(feat, []).append(val)
+        else:
+            upos.append(ud)
+    feats = sorted(values)
+
+    found: Dict[Signature, None] = {}
+    for _ in range(50 * n):
+        if len(found) >= n:
+            break
+        chosen = sorted(rng.sample(feats, rng.randint(0, 5)))
+        sig = (
+            rng.choice(upos),
+            "|".join(f"{feat}={rng.choice(values[feat])}" for feat in chosen) or "_",
+        )
+        try:
+            translator.translate(CoNLLRow.make(row(1, "x", "x", sig)))
+        except AssertionError:
+            continue
+        found[sig] = None
+    return list(found)
+
+
+def write_dataset(
+    language: LanguageCoding, folder: Path, tokens: int, seed: int = 0
+) -> Dataset:
+    """Write `tokens` UD tokens and a matching UniMorph lexicon to `folder`."""
+    rng = random.Random(f"{seed}:{language.ud}")
+    translator = translator_class(language)(clever=True, replace_feats=False)
+    sigs = signatures(translator, 400, rng)
+    sig_weights = zipf_weights(len(sigs))
+    lemmas = [
+        "".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 8)))
+        for _ in range(max(100, tokens // 10))
+    ]
+    lemma_weights = zipf_weights(len(lemmas))
+
+    folder.mkdir(parents=True, exist_ok=True)
+    ud_file = folder / f"{language.ud}-ud-bench.conllu"
+    um_file = folder / language.um
+    form_sigs: Dict[str, Signature] = {}
+    seen: Set[Tuple[str, str, Signature]] = set()
+    written = 0
+    with open(ud_file, "w", encoding="utf-8") as f:
+        sentence = 0
+        while written < tokens:
+            f.write(f"# sent_id = {sentence}\n")
+            length = min(rng.randint(3, 25), tokens - written)
+            for id_ in range(1, length + 1):
+                lemma = rng.choices(lemmas, cum_weights=lemma_weights)[0]
+                form = lemma + rng.choice(SUFFIXES)
+                sig = form_sigs.setdefault(
+                    form, rng.choices(sigs, cum_weights=sig_weights)[0]
+                )
+                if rng.random() < 0.15:
+                    sig = rng.choices(sigs, cum_weights=sig_weights)[0]
+                seen.add((form, lemma, sig))
+                f.write(row(id_, form, lemma, sig) + "\n")
+            f.write("\n")
+            written += length
+            sentence += 1
+
+    entries = 0
+    with open(um_file, "w", encoding="utf-8") as f:
+        for form, lemma, sig in sorted(seen):
+            if rng.random() < 0.15:
+                sig = rng.choice(sigs)
+            tag = translator.translate(CoNLLRow.make(row(1, form, lemma, sig))).misc
+            if not tag:
+                continue
+            f.write(f"{lemma}\t{form}\t{tag}\n")
+            entries += 1
+    return Dataset(language, ud_file, um_file, written, entries)
@@ -0,0 +1,126 @@
+"""
+What the result cache keys depend on, and how stored conversions are reused.
+"""
+
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from ud_compatibility import results
+from ud_compatibility.languages import get_lang
+from ud_compatibility.results import ResultCache, file_digest
+from ud_compatibility.translator import translator_class
+
+SPANISH = get_lang("es")
+PORTUGUESE = get_lang("pt")
+SENTENCE = "1\tcantó\tcantar\tVERB\t_\tMood=Ind|Tense=Past\t0\troot\t_\t_\n\n"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "results")
+
+
+@pytest.fixture
+def ud_file(tmp_path):
+    path = tmp_path / "es-ud-dev.conllu"
+    path.write_text(SENTENCE, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def um_file(tmp_path):
+    path = tmp_path / "spa"
+    path.write_text("cantar\tcantó\tV;IND;PST;PFV;3;SG\n", encoding="utf-8")
+    return path
+
+
+def touch(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_conversion_key_changes_with_its_inputs(cache, ud_file, tmp_path, monkeypatch):
+    key = cache.conversion_key(SPANISH, True, ud_file, None, "code")
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") == key
+    others = [
+        cache.conversion_key(SPANISH, False, ud_file, None, "code"),
+        cache.conversion_key(PORTUGUESE, True, ud_file, None, "code"),
+        cache.conversion_key(SPANISH, True, ud_file, ".gz", "code"),
+        cache.conversion_key(SPANISH, True, ud_file, None, "edited code"),
+    ]
+    assert len({key, *others}) == 5
+
+    touch(ud_file)
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") == key
+    ud_file.write_text(SENTENCE * 2, encoding="utf-8")
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") != key
+    ud_file.write_text(SENTENCE, encoding="utf-8")
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") == key
+
+    # An edited translator class, or mapping.
+    cls = translator_class(SPANISH)
+    monkeypatch.setitem(results._translator_digests, cls, "edited")
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") != key
+    monkeypatch.delitem(results._translator_digests, cls)
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") == key
+    mapping = tmp_path / "UD-UniMorph.tsv"
+    shutil.copyfile(results.UD2UM_FILE, mapping)
+    monkeypatch.setattr(results, "UD2UM_FILE", mapping)
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") == key
+    with open(mapping, "a", encoding="utf-8") as f:
+        f.write("Foo=Bar\tBAR\n")
+    assert cache.conversion_key(SPANISH, True, ud_file, None, "code") != key
+
+
+def test_evaluation_key_changes_with_its_inputs(cache, ud_file, um_file):
+    key = cache.evaluation_key(SPANISH, True, um_file, ud_file, "lemma", "code")
+    others = [
+        cache.evaluation_key(SPANISH, False, um_file, ud_file, "lemma", "code"),
+        cache.evaluation_key(SPANISH, True, um_file, ud_file, "form", "code"),
+        cache.evaluation_key(SPANISH, True, um_file, ud_file, "lemma", "edited"),
+        cache.conversion_key(SPANISH, True, ud_file, None, "code"),
+    ]
+    assert len({key, *others}) == 5
+
+    touch(um_file)
+    assert cache.evaluation_key(SPANISH, True, um_file, ud_file, "lemma", "code") == key
+    um_file.write_text("cantar\tcanto\tV;IND;PRS;1;SG\n", encoding="utf-8")
+    assert cache.evaluation_key(SPANISH, True, um_file, ud_file, "lemma", "code") != key
+
+
+def test_archive_members_have_their_own_digests(tmp_path):
+    archive = tmp_path / "UD_Spanish-master.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("UD_Spanish-master/es-ud-dev.conllu", SENTENCE)
+        z.writestr("UD_Spanish-master/es-ud-test.conllu", SENTENCE)
+    dev = tmp_path / "UD_Spanish-master.zip::UD_Spanish-master/es-ud-dev.conllu"
+    test = tmp_path / "UD_Spanish-master.zip::UD_Spanish-master/es-ud-test.conllu"
+    assert file_digest(dev) != file_digest(test)
+    assert file_digest(dev) != file_digest(archive)
+    assert file_digest(dev) == file_digest(dev)
+
+
+def test_scores_round_trip(cache):
+    assert cache.score("key") is None
+    cache.put_score("key", (3, 4))
+    assert cache.score("key") == (3, 4)
+
+
+def test_stored_outputs_are_reused_while_intact(cache, tmp_path):
+    output = tmp_path / "es-um-dev.conllu"
+    output.write_text(SENTENCE, encoding="utf-8")
+    assert not cache.fetch_output("key", output)
+    cache.put_output("key", output)
+
+    copy = tmp_path / "copy" / "es-um-dev.conllu"
+    assert cache.fetch_output("key", copy)
+    assert copy.read_text(encoding="utf-8") == SENTENCE
+
+    # Editing the output in place also edits what it is linked to.
+    with open(output, "a", encoding="utf-8") as f:
+        f.write(SENTENCE)
+    assert not cache.fetch_output("key", tmp_path / "again.conllu")
+    assert not (tmp_path / "again.conllu").exists()
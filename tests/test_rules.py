@@ -0,0 +1,64 @@
+"""
+The rule tables against the hand-written `lgspec_modify` methods they replaced.
+
+`data/lgspec_modify.tsv` froze the outputs of the original methods: for each
+class, the bundles its method named, each with one of the named features
+added or removed, applied to forms ending in -do, -to, -ra, -ran and -ram and
+to one ending in none of them. A form of "*" stands for all of these, where
+the output did not depend on it. Inputs on which the original raised are left
+out. Outputs are compared as sets of features.
+"""
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from ud_compatibility import translator
+from ud_compatibility.rules import Rule, RuleSet
+from ud_compatibility.utils import CoNLLRow, UmTag
+
+CASES = Path(__file__).parent / "data" / "lgspec_modify.tsv"
+FORMS = ["casa", "amado", "escrito", "amara", "amaran", "amaram"]
+
+
+def read_cases():
+    with open(CASES, encoding="utf-8", newline="") as f:
+        for name, form, um, expected in csv.reader(f, delimiter="\t"):
+            for form in FORMS if form == "*" else [form]:
+                yield name, form, um, expected
+
+
+def row(form: str) -> CoNLLRow:
+    return CoNLLRow("1", form, "_", "_", "_", "_", "_", "_", "_", "_")
+
+
+@pytest.mark.parametrize("name", sorted({case[0] for case in read_cases()}))
+def test_rules_match_original(name):
+    lgspec = getattr(translator, name)(clever=True, replace_feats=False)
+    wrong = []
+    for case_name, form, um, expected in read_cases():
+        if case_name != name:
+            continue
+        got = lgspec.lgspec_modify(row(form), UmTag(um))
+        if set(got.split(";")) != set(expected.split(";")):
+            wrong.append((form, um, expected, got))
+    assert not wrong
+
+
+def test_rule_actions():
+    rules = RuleSet(
+        [
+            Rule(has="V;PST", lacks="IPFV", add="PFV"),
+            Rule(equals="V;V.MSDR", become="PRS;V.PTCP"),
+            Rule(exceeds="IPFV;SBJV", suffix=("ra", "ran"), add="LGSPEC1"),
+            Rule(has="FIN", discard="FIN;IND"),
+        ]
+    )
+    assert set(rules.apply("x", "V;PST").split(";")) == {"V", "PST", "PFV"}
+    assert set(rules.apply("x", "V;V.MSDR").split(";")) == {"PRS", "V.PTCP"}
+    assert "LGSPEC1" in rules.apply("amara", "IPFV;SBJV;V").split(";")
+    assert "LGSPEC1" not in rules.apply("amaba", "IPFV;SBJV;V").split(";")
+    assert "LGSPEC1" not in rules.apply("amara", "IPFV;SBJV").split(";")
+    assert set(rules.apply("x", "FIN;IND;V").split(";")) == {"V"}
+    assert rules.suffix_length == 3
@@ -0,0 +1,99 @@
+"""
+The byte-level `Splicer` against the text path it stands in for.
+
+Both must write the same bytes for every input, whichever column is replaced,
+and however the file is cut into sentence chunks.
+"""
+
+import pytest
+
+from ud_compatibility.languages import get_lang
+from ud_compatibility.marry import EvaluationInstance
+from ud_compatibility.utils import sentence_chunks
+
+TOKENS = [
+    "1-2\tdel\t_\t_\t_\t_\t_\t_\t_\t_",
+    "1\tde\tde\tADP\t_\t_\t0\troot\t_\t_",
+    "2\tel\tel\tDET\t_\tDefinite=Def|Gender=Masc|Number=Sing\t3\tdet\t_\t_",
+    "3\tcantó\tcantar\tVERB\t_\tMood=Ind|Tense=Past|VerbForm=Fin\t0\troot\t_\t_",
+    "3.1\tcasas\tcasa\tNOUN\t_\tGender=Fem|Number=Plur\t_\t_\t3:obj\t_",
+    "4\tcantaran\tcantar\tVERB\t_\tMood=Sub|Tense=Imp|VerbForm=Fin\t0\troot\t_\t_",
+    "5\tamado\tamar\tVERB\t_\tGender=Masc|VerbForm=Part\t4\tacl\t_\tSpaceAfter=No",
+    "6\tárboles\tárbol\tNOUN\t_\tGender=Masc|Number=Plur\t4\tobj\t_\t_",
+    "7\t»\t»\tPUNCT\t_\tPunctType=Quot\t4\tpunct\t_\t_",
+]
+SENTENCE = "\n".join(["# sent_id = 1", "# text = ¿Del cantó?»", *TOKENS]) + "\n"
+
+CASES = {
+    "plain": SENTENCE + "\n" + SENTENCE + "\n",
+    "no final newline": SENTENCE + "\n" + SENTENCE.rstrip("\n"),
+    "no final blank line": SENTENCE + "\n" + SENTENCE,
+    "crlf": (SENTENCE + "\n" + SENTENCE + "\n").replace("\n", "\r\n"),
+    "some crlf": SENTENCE.replace("\n", "\r\n", 3) + "\n" + SENTENCE + "\r\n",
+    "lone cr": SENTENCE.replace("\n", "\r", 2) + "\n" + SENTENCE,
+    "whitespace": "  # indented\n"
+    + (SENTENCE.replace("\t_\n", "\t_  \n", 2) + "\n") * 2,
+    "blank lines": "\n\n" + SENTENCE + "\n\n\n" + SENTENCE,
+    "empty": "",
+}
+
+
+@pytest.fixture
+def instances(tmp_path):
+    um_file = tmp_path / "spa"
+    um_file.write_text("cantar\tcantó\tV;IND;PST;PFV;3;SG\n", encoding="utf-8")
+    return {
+        (column, clever): EvaluationInstance(
+            get_lang("es"),
+            clever=clever,
+            replace_feats=column == "feats",
+            files=(um_file, []),
+            lexicon_cache=None,
+        )
+        for column in ("feats", "misc")
+        for clever in (False, True)
+    }
+
+
+def text_path(instance, file):
+    return "".join(instance.converted_lines(instance.read_lines(file))).encode()
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_splice_matches_text_path(tmp_path, instances, case):
+    file = tmp_path / "in.conllu"
+    file.write_bytes(CASES[case].encode("utf-8"))
+    for (column, clever), instance in instances.items():
+        expected = text_path(instance, file)
+        assert instance.splicer.convert_bytes(file) == expected, (column, clever)
+        chunks = list(sentence_chunks(file, 64))
+        assert len(chunks) > 1 or not CASES[case]
+        spliced = b"".join(
+            instance.splicer.convert_bytes(file, start, end) for start, end in chunks
+        )
+        assert spliced == expected, (column, clever)
+
+
+def test_splice_translates_only_its_column(tmp_path, instances):
+    file = tmp_path / "in.conllu"
+    file.write_bytes(CASES["plain"].encode("utf-8"))
+    for (column, clever), instance in instances.items():
+        lines = instance.splicer.convert_bytes(file).decode().splitlines()
+        # Ends of words decide how some are translated, in clever mode.
+        sung = lines[5].split("\t")
+        assert sung[:5] == TOKENS[3].split("\t")[:5]
+        assert "V" in sung[5 if column == "feats" else 9].split(";")
+
+
+@pytest.mark.parametrize(
+    "line",
+    ["1\tde\tde\tADP\t_\t_\t0\troot\t_", "1\tde\tde\tADP\t_\t_\t0\troot\t_\t_\tx"],
+)
+def test_splice_rejects_what_the_text_path_does(tmp_path, instances, line):
+    file = tmp_path / "in.conllu"
+    file.write_bytes(f"{line}\n".encode("utf-8"))
+    for instance in instances.values():
+        with pytest.raises(TypeError):
+            text_path(instance, file)
+        with pytest.raises(TypeError):
+            instance.splicer.convert_bytes(file)
@@ -0,0 +1,126 @@
+"""
+Compressed files and archive members, named as `archive::member`.
+"""
+
+import gzip
+import io
+import lzma
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from ud_compatibility import paths
+from ud_compatibility.languages import get_lang
+from ud_compatibility.paths import FileGetter, output_filepath
+from ud_compatibility.streams import (
+    archive_members,
+    exists,
+    is_plain,
+    open_text,
+    split_member,
+    stored_file,
+)
+
+SENTENCE = "# text = Cantó.\n1\tCantó\tcantar\tVERB\t_\t_\t0\troot\t_\t_\n\n"
+MEMBERS = {
+    "UD_Spanish-master/es-ud-dev.conllu": SENTENCE,
+    "UD_Spanish-master/es-ud-test.conllu": SENTENCE * 2,
+    "UD_Spanish-master/README.md": "# UD Spanish\n",
+}
+
+
+def write_zip(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as z:
+        for name, text in MEMBERS.items():
+            z.writestr(name, text)
+    return path
+
+
+def write_tar(path: Path) -> Path:
+    with tarfile.open(path, "w:gz" if path.suffix == ".gz" else "w") as tar:
+        folder = tarfile.TarInfo("UD_Spanish-master")
+        folder.type = tarfile.DIRTYPE
+        tar.addfile(folder)
+        for name, text in MEMBERS.items():
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return path
+
+
+ARCHIVES = {".zip": write_zip, ".tar": write_tar, ".tar.gz": write_tar}
+
+
+def test_split_member():
+    member = Path("data/UD_Spanish-master.zip::UD_Spanish-master/es-ud-dev.conllu")
+    archive = Path("data/UD_Spanish-master.zip")
+    assert split_member(member) == (archive, "UD_Spanish-master/es-ud-dev.conllu")
+    assert stored_file(member) == archive
+    assert member.name == "es-ud-dev.conllu"
+    assert not is_plain(member)
+    plain = Path("data/es-ud-dev.conllu")
+    assert split_member(plain) == (plain, None)
+    assert is_plain(plain)
+
+
+@pytest.mark.parametrize("suffix", ARCHIVES)
+def test_archive_members(tmp_path, suffix):
+    archive = ARCHIVES[suffix](tmp_path / f"UD_Spanish-master{suffix}")
+    members = archive_members(archive, "*es-ud-*.conllu")
+    assert [str(m) for m in members] == [
+        f"{archive}::UD_Spanish-master/es-ud-dev.conllu",
+        f"{archive}::UD_Spanish-master/es-ud-test.conllu",
+    ]
+    for member in members:
+        assert exists(member)
+        with open_text(member) as f:
+            assert f.read() == MEMBERS[split_member(member)[1]]  # type: ignore
+    assert not exists(Path(f"{archive}::UD_Spanish-master/es-ud-train.conllu"))
+    assert not exists(Path(f"{archive}::UD_Spanish-master"))
+    assert not exists(Path(f"{tmp_path / 'missing.zip'}::es-ud-dev.conllu"))
+    with pytest.raises(ValueError):
+        with open_text(members[0], "w"):
+            pass
+
+
+def test_compressed_files_round_trip(tmp_path):
+    for suffix, module in ((".gz", gzip), (".xz", lzma)):
+        path = tmp_path / f"es-um-dev.conllu{suffix}"
+        with open_text(path, "w") as f:
+            f.write(SENTENCE)
+        assert not is_plain(path)
+        assert module.decompress(path.read_bytes()).decode("utf-8") == SENTENCE
+        with open_text(path) as f:
+            assert f.read() == SENTENCE
+
+
+def test_output_filepath(tmp_path):
+    member = Path(f"{tmp_path}/UD_Spanish-master.zip::UD/es-ud-dev.conllu")
+    assert output_filepath(member) == tmp_path / "es-um-dev.conllu"
+    assert output_filepath(member, ".xz") == tmp_path / "es-um-dev.conllu.xz"
+    compressed = tmp_path / "UD_Spanish-master" / "es-ud-dev.conllu.gz"
+    assert output_filepath(compressed) == compressed.with_name("es-um-dev.conllu")
+
+
+def test_file_getter(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, "UD_FOLDER", tmp_path)
+    spanish = get_lang("es")
+    # Only archives at first: their members are found without extracting them.
+    write_zip(tmp_path / "UD_Spanish-master.zip")
+    _, ud_files = FileGetter.get(spanish, convert=True)
+    assert [split_member(f)[1] for f in ud_files] == [
+        "UD_Spanish-master/es-ud-dev.conllu",
+        "UD_Spanish-master/es-ud-test.conllu",
+    ]
+
+    # A plain copy is preferred to a compressed one of the same file.
+    folder = tmp_path / "UD_Spanish-master"
+    folder.mkdir()
+    (folder / "es-ud-dev.conllu").write_text(SENTENCE, encoding="utf-8")
+    (folder / "es-ud-dev.conllu.gz").write_bytes(gzip.compress(SENTENCE.encode()))
+    (folder / "es-ud-train.conllu.xz").write_bytes(lzma.compress(SENTENCE.encode()))
+    _, ud_files = FileGetter.get(spanish, convert=True)
+    assert [f.name for f in ud_files] == ["es-ud-dev.conllu", "es-ud-train.conllu.xz"]
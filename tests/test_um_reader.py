@@ -0,0 +1,137 @@
+"""
+The lexicon cache, and the memory-mapped index against the `Lexicon` it was built
+from.
+"""
+
+import os
+
+import pytest
+
+from ud_compatibility import um_reader
+from ud_compatibility.um_reader import (
+    MappedLexicon,
+    build_index,
+    index_path,
+    load_lexicon,
+    mapped_lexicon,
+    update_index,
+)
+
+UNIMORPH = """\
+hablar\thablo\tV;IND;PRS;1;SG
+hablar\thabla\tV;IND;PRS;3;SG
+hablar\thabla\tV;IMP;POS;2;SG
+hablar\thablara\tV;SBJV;PST;1;SG
+hablar\thablara\tV;SBJV;PST;3;SG
+hablar\thablado\tV.PTCP;PST;MASC;SG
+hablado\thablado\tADJ;MASC;SG
+ser\tfue\tV;IND;PST;PFV;3;SG
+ir\tfue\tV;IND;PST;PFV;3;SG
+ir\tfue\tV;IND;PST;PFV;3;SG
+árbol\tárbol\tN;MASC;SG
+árbol\tárboles\tN;MASC;PL
+ñu\tñu\tN;MASC;SG
+zapato\tzapatos\tN;MASC;PL
+ábside\tábsides\tN;MASC;PL
+"""
+
+
+@pytest.fixture
+def um_file(tmp_path):
+    path = tmp_path / "spa"
+    path.write_text(UNIMORPH, encoding="utf-8")
+    return path
+
+
+def joint_sets(joint, pairs):
+    return {pair: sorted(joint[pair]) for pair in pairs}
+
+
+@pytest.mark.parametrize("bloom_bits_per_form", [0, 10])
+def test_index_matches_lexicon(tmp_path, um_file, bloom_bits_per_form):
+    lexicon = load_lexicon(um_file)
+    build_index(lexicon, tmp_path / "spa.umidx", um_file, bloom_bits_per_form)
+    mapped = MappedLexicon(tmp_path / "spa.umidx")
+
+    assert len(mapped) == len(lexicon)
+    assert set(mapped) == set(lexicon)
+    for form in lexicon:
+        assert form in mapped
+        assert mapped.tags[form] == lexicon.tags[form]
+        assert mapped.lemmas[form] == lexicon.lemmas[form]
+    pairs = set(lexicon.joint)
+    assert set(mapped.joint) == pairs
+    assert len(pairs) == len(lexicon.joint) == 12
+    assert joint_sets(mapped.joint, pairs) == joint_sets(lexicon.joint, pairs)
+    assert [lexicon.bundles[i] for i in lexicon.joint["fue", "ir"]] == [
+        frozenset("V;IND;PST;PFV;3;SG".split(";"))
+    ]
+
+
+def test_index_misses(tmp_path, um_file):
+    lexicon = load_lexicon(um_file)
+    build_index(lexicon, tmp_path / "spa.umidx", um_file)
+    mapped = MappedLexicon(tmp_path / "spa.umidx")
+
+    for found in (lexicon, mapped):
+        # Unknown forms, sorting before, between and after the known ones.
+        for form in ("", "aaa", "hablas", "zzz", "ñandú", 3):
+            assert form not in found
+            with pytest.raises(KeyError):
+                found.tags[form]
+        # Known forms with another lemma, or an unknown one.
+        for pair in [("fue", "hablar"), ("fue", "estar"), ("fue", "")]:
+            assert found.joint.get(pair) is None
+            with pytest.raises(KeyError):
+                found.joint[pair]
+        assert found.joint.get(("nada", "ser")) is None
+
+
+def test_bloom_false_positives_miss(tmp_path, um_file):
+    lexicon = load_lexicon(um_file)
+    # One bit per form: most unknown forms get past the filter.
+    build_index(lexicon, tmp_path / "spa.umidx", um_file, bloom_bits_per_form=1)
+    mapped = MappedLexicon(tmp_path / "spa.umidx")
+
+    candidates = [f"falso{i}" for i in range(200)]
+    passed = [c for c in candidates if mapped._maybe_contains(c.encode("utf-8"))]
+    assert passed
+    for form in passed:
+        assert form not in mapped
+        assert mapped.joint.get((form, "hablar")) is None
+        with pytest.raises(KeyError):
+            mapped.bundle_ids(form)
+
+
+def test_mapped_lexicon_needs_a_fresh_index(tmp_path, um_file):
+    index_dir = tmp_path / "index"
+    with pytest.raises(FileNotFoundError):
+        mapped_lexicon(um_file, index_dir)
+
+    assert update_index(um_file, index_dir)
+    assert not update_index(um_file, index_dir)
+    assert "hablo" in mapped_lexicon(um_file, index_dir)
+
+    um_file.write_text(UNIMORPH + "hablar\thablamos\tV;IND;PRS;1;PL\n", "utf-8")
+    with pytest.raises(ValueError):
+        mapped_lexicon(um_file, index_dir)
+    assert update_index(um_file, index_dir)
+    assert "hablamos" in mapped_lexicon(um_file, index_dir)
+    assert index_path(um_file, index_dir).is_file()
+
+
+def test_touched_lexicon_cache_is_restamped(tmp_path, um_file, monkeypatch):
+    hashed = []
+    sha256 = um_reader._sha256
+    monkeypatch.setattr(um_reader, "_sha256", lambda f: hashed.append(f) or sha256(f))
+    cache_dir = tmp_path / "cache"
+    expected = set(load_lexicon(um_file, cache_dir).joint)
+    assert len(hashed) == 1  # To write the cache.
+
+    stat = um_file.stat()
+    os.utime(um_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert set(load_lexicon(um_file, cache_dir).joint) == expected
+    assert len(hashed) == 2  # The hash vouches for the touched file, once.
+    assert set(load_lexicon(um_file, cache_dir).joint) == expected
+    assert len(hashed) == 2
+    assert [p.suffix for p in cache_dir.iterdir()] == [".lexicon"]
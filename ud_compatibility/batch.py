@@ -0,0 +1,131 @@
+"""
+Translate UD annotations in memory, without touching files or printing.
+
+`BatchTranslator` wraps one language's `Translator` for use as a library.
+Inputs are consumed lazily and translated a batch at a time, and each tag
+signature is translated once per batch however often it recurs:
+
+    translator = BatchTranslator("es")
+    for batch in translator.translate_lines(lines):
+        ...
+    tags = next(translator.translate_tags([("NOUN", "Gender=Fem|Number=Plur", "x")]))
+"""
+
+from itertools import islice
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .languages import LanguageCoding, get_lang
+from .translator import Translator, get_translator
+from .utils import CoNLLRow, UmTag, is_conll_useless
+
+T = TypeVar("T")
+
+BATCH_SIZE = 1024
+
+# (UPOS, FEATS, FORM); the form matters only to clever translators.
+TagTuple = Tuple[str, str, str]
+Sentence = Union[str, Sequence[str]]
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _row(tag: TagTuple) -> CoNLLRow:
+    upostag, feats, form = tag
+    return CoNLLRow._make(["_", form, "_", upostag, "_", feats, "_", "_", "_", "_"])
+
+
+class BatchTranslator:
+    def __init__(
+        self,
+        language: Union[str, LanguageCoding],
+        clever=True,
+        replace_feats=True,
+        cache_size: int = 2 ** 16,
+        translator: Optional[Translator] = None,
+    ) -> None:
+        if isinstance(language, str):
+            language = get_lang(language)
+        self.language = language
+        if translator is None:
+            translator = get_translator(language, clever, replace_feats, cache_size)
+        self.translator = translator
+
+    def tags(self, records: Sequence[CoNLLRow]) -> List[UmTag]:
+        """Translate one batch, looking each distinct signature up once."""
+        translator = self.translator
+        found: Dict[Hashable, UmTag] = {}
+        tags = []
+        for record in records:
+            key = translator.cache_key(record)
+            tag = found.get(key)
+            if tag is None:
+                tag = found[key] = translator.translate_tag(record)
+            tags.append(tag)
+        return tags
+
+    def _lines(self, batch: Sequence[str]) -> List[str]:
+        records = {
+            i: CoNLLRow.make(line)
+            for i, line in enumerate(batch)
+            if not is_conll_useless(line)
+        }
+        replace_feats = self.translator.replace_feats
+        translated = list(batch)
+        for (i, record), tag in zip(records.items(), self.tags(list(records.values()))):
+            if replace_feats:
+                record = record._replace(feats=tag)
+            else:
+                record = record._replace(misc=tag)
+            translated[i] = "\t".join(record)
+        return translated
+
+    def translate_tags(
+        self, tags: Iterable[TagTuple], batch_size: int = BATCH_SIZE
+    ) -> Iterator[List[UmTag]]:
+        for batch in batched(tags, batch_size):
+            yield self.tags([_row(tag) for tag in batch])
+
+    def translate_lines(
+        self, lines: Iterable[str], batch_size: int = BATCH_SIZE
+    ) -> Iterator[List[str]]:
+        """Translate CoNLL-U lines; comments and blank lines pass through."""
+        stripped = (line.strip() for line in lines)
+        for batch in batched(stripped, batch_size):
+            yield self._lines(batch)
+
+    def translate_sentences(
+        self, sentences: Iterable[Sentence], batch_size: int = 64
+    ) -> Iterator[List[List[str]]]:
+        """Translate sentences, given as lists of lines or as text blocks."""
+        for batch in batched(sentences, batch_size):
+            sentences_ = [
+                [line.strip() for line in sentence.strip().split("\n")]
+                if isinstance(sentence, str)
+                else [line.strip() for line in sentence]
+                for sentence in batch
+            ]
+            lines = self._lines([line for s in sentences_ for line in s])
+            translated = []
+            start = 0
+            for sentence in sentences_:
+                translated.append(lines[start : start + len(sentence)])
+                start += len(sentence)
+            yield translated
@@ -0,0 +1,154 @@
+"""
+Single-pass UD → UniMorph feature conversion.
+
+`CompiledConverter` produces the same features as `translator.ud2um`, but it
+reads the `UPOS|Feat=Val|Feat[layer]=Val,Val` string once. Every distinct
+feature string is classified and mapped the first time it is seen, so later
+tokens cost one dict lookup per feature.
+"""
+
+import re
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .utils import UdFeat, UmFeat, UmTag
+
+EMPTY_FEAT = UmFeat("_")
+PSOR = "psor"
+
+_LAYER_RE = re.compile(r"\[(.*?)\]")
+
+# (UniMorph contribution of the part on its own, its layer or None)
+_Part = Tuple[UmFeat, Optional[str]]
+
+
+def _possession(psor_parts: List[str]) -> UmFeat:
+    if any("None" in p for p in psor_parts):
+        return UmFeat("PSSD")
+
+    try:
+        assert len(psor_parts) <= 2
+    except AssertionError:
+        print(psor_parts)
+        raise
+
+    if "Number[psor]=Plur" in psor_parts:
+        number = "P"
+    elif "Number[psor]=Sing" in psor_parts:
+        number = "S"
+    elif "Number[psor]=Dual" in psor_parts:
+        number = "D"
+    else:
+        assert not any("Number" in p for p in psor_parts)
+        number = ""
+
+    if "Person[psor]=1" in psor_parts:
+        person = "1"
+    elif "Person[psor]=2" in psor_parts:
+        person = "2"
+    elif "Person[psor]=3" in psor_parts:
+        person = "3"
+    else:
+        assert not any("Person" in p for p in psor_parts)
+        person = ""
+
+    return UmFeat(f"PSS{person}{number}")
+
+
+def _argument(parts: List[str]) -> UmFeat:
+    def has(needle: str) -> bool:
+        return any(needle in p for p in parts)
+
+    if has("[psed]") or has("[gram]"):
+        return EMPTY_FEAT
+
+    if has("[erg]"):
+        kind = "ER"
+    elif has("[dat]"):
+        kind = "DA"
+    elif has("[abs]"):
+        kind = "AB"
+    else:
+        print(parts)
+        raise AssertionError
+
+    if has("=Plur"):
+        number = "P"
+    elif has("=Sing"):
+        number = "S"
+    elif has("=Dual"):
+        number = "D"
+    else:
+        assert not has("Number")
+        number = ""
+
+    if has("=1"):
+        person = "1"
+    elif has("=2"):
+        person = "2"
+    elif has("=3"):
+        person = "3"
+    else:
+        assert not has("Person")
+        person = ""
+    return UmFeat(f"ARG{kind}{person}{number}")
+
+
+def _arguments(arg_parts: List[Tuple[str, str]]) -> List[UmFeat]:
+    layers = dict.fromkeys(layer for layer, _ in arg_parts)
+    return [
+        _argument([p for _, p in arg_parts if layer in p]) for layer in layers
+    ]
+
+
+class CompiledConverter:
+    def __init__(self, mapping: Mapping[UdFeat, UmFeat]) -> None:
+        self.mapping = mapping
+        self._parts: Dict[str, _Part] = {}
+        for ud in mapping:
+            self._compile_part(ud)
+
+    def _lookup(self, part: str) -> UmFeat:
+        return self.mapping.get(UdFeat(part), EMPTY_FEAT)
+
+    def _compile_part(self, part: str) -> _Part:
+        if "," not in part:
+            um = self._lookup(part)
+        else:
+            key, vals = part.split("=")
+            all_parts = [self._lookup(f"{key}={val}") for val in vals.split(",")]
+            all_parts = [p for p in all_parts if p != EMPTY_FEAT]
+            um = UmFeat(f"{{{'/'.join(all_parts)}}}") if all_parts else EMPTY_FEAT
+
+        layer: Optional[str] = None
+        if f"[{PSOR}]" in part:
+            layer = PSOR
+        elif "[" in part:
+            layer = _LAYER_RE.search(part).group(1)  # type: ignore
+
+        compiled = self._parts[part] = (um, layer)
+        return compiled
+
+    def __call__(self, ud_tag: str) -> UmTag:
+        """Convert a `UPOS|feats` string, as `ud2um(UdTag(ud_tag))` would."""
+        parts = self._parts
+        feats: List[UmFeat] = []
+        psor_parts: List[str] = []
+        arg_parts: List[Tuple[str, str]] = []
+        for part in dict.fromkeys(ud_tag.split("|")):
+            try:
+                um, layer = parts[part]
+            except KeyError:
+                um, layer = self._compile_part(part)
+            if layer is not None:
+                if layer == PSOR:
+                    psor_parts.append(part)
+                else:
+                    arg_parts.append((layer, part))
+            if um != EMPTY_FEAT:
+                feats.append(um)
+
+        if psor_parts or arg_parts:
+            layered = [_possession(psor_parts)] if psor_parts else []
+            layered.extend(_arguments(arg_parts))
+            feats[:0] = [f for f in layered if f != EMPTY_FEAT]
+        return UmTag(";".join(feats) or EMPTY_FEAT)
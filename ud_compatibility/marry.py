@@ -2,17 +2,123 @@
 Convert Universal Dependencies morphology annotations to UniMorph.
 """
 
+import io
+import os
+import sys
+import time
 from argparse import ArgumentParser, Namespace
+from collections import deque
+from functools import lru_cache, partial, wraps
+from itertools import groupby
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple, Union
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from termcolor import cprint
 
+from . import splice, streams, um_reader
 from .languages import languages, LanguageCoding, get_lang
-from .paths import FileGetter, output_filepath
-from .translator import Translator, translators
-from .um_reader import unimorph
-from .utils import CoNLLRow, is_conll_useless, ud_iterator
+from .mismatches import Mismatches, bundle_string
+from .paths import (
+    LEXICON_CACHE_FOLDER,
+    RESULT_CACHE_FOLDER,
+    FileGetter,
+    output_filepath,
+    um_filepath,
+)
+from .profiling import Profile
+from .results import ResultCache, source_digest
+from .splice import Splicer
+from .streams import is_plain, open_binary, open_text, replacing
+from .translator import Translator, get_translator
+from .um_reader import (
+    Lexicon,
+    MappedLexicon,
+    load_lexicon,
+    mapped_lexicon,
+    update_index,
+)
+from .utils import (
+    CoNLLRow,
+    Form,
+    Lemma,
+    is_conll_useless,
+    sentence_chunks,
+    ud_iterator,
+)
+
+WRITE_BUFFER_SIZE = 1 << 20
+# `convert --ud -` reads from stdin and writes to stdout.
+STDIO = Path("-")
+CHUNK_SIZE = 16 << 20
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# Tokens that share (form, lemma, UniMorph tag) score identically.
+TokenType = Tuple[str, str, str]
+
+
+# The `TranslationCache.stats` that count events rather than describe the cache.
+CACHE_COUNTERS = ("hits", "misses", "evictions")
+
+
+def _cache_stats(translators_: Sequence[Translator]) -> Dict[str, Dict[str, int]]:
+    return {configuration_name(t): t.cache.stats() for t in translators_}
+
+
+def _cache_deltas(
+    before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]
+) -> Dict[str, Dict[str, int]]:
+    return {
+        name: {
+            key: value - before[name][key] if key in CACHE_COUNTERS else value
+            for key, value in stats.items()
+        }
+        for name, stats in after.items()
+    }
+
+
+def profiled(command: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Write a profile report for each file the method handles, if profiling."""
+
+    def decorate(method: Callable[..., T]) -> Callable[..., T]:
+        @wraps(method)
+        def run(self: "EvaluationInstance", file: Path, *args) -> T:
+            if self.profile is None:
+                return method(self, file, *args)
+            self.profile.reset()
+            # Caches outlive files, so their counters are reported per file too.
+            before = _cache_stats(self.translators)
+            start = time.perf_counter()
+            result = method(self, file, *args)
+            self.profile.dump(
+                f"{file.stem}.{command}",
+                command=command,
+                language=self.language.name,
+                file=str(file),
+                wall_seconds=time.perf_counter() - start,
+                caches=_cache_deltas(before, _cache_stats(self.translators)),
+            )
+            return result
+
+        return run
+
+    return decorate
 
 
 class EvaluationInstance:
@@ -22,16 +128,80 @@ class EvaluationInstance:
         clever=False,
         replace_feats=False,
         print_good=False,
+        cache_size: int = 2 ** 16,
+        files: Optional[Tuple[Path, List[Path]]] = None,
+        lexicon_cache: Optional[Path] = LEXICON_CACHE_FOLDER,
+        translators: Optional[Sequence[Translator]] = None,
+        lexicon_index: Optional[Path] = None,
+        profile: Optional[Path] = None,
+        scoring="lemma",
     ) -> None:
         self.language = language
-        self.um_file, self.ud_files = FileGetter.get(language, replace_feats)
-        translator_class = translators.get(language, Translator)
-        self.translator = translator_class(clever, replace_feats)
+        if files is None:
+            files = FileGetter.get(language, replace_feats)
+        self.um_file, self.ud_files = files
+        # Every configuration in `translators` is scored in the same pass over
+        # each file; `self.translator` is the one used for conversion.
+        if translators is None:
+            translator = get_translator(language, clever, replace_feats, cache_size)
+            translators = [translator]
+        self.translators = list(translators)
+        self.translator = self.translators[0]
         self.print_good = print_good
+        # "lemma", or the form-level recall of the paper: "form", or "sets".
+        self.scoring = scoring
+        # Where scoring counts mismatched (and, with `print_good`, good) tokens.
+        self.mismatches: Optional[Mismatches] = None
+        # Suffix of the compression to write converted files with, if any.
+        self.compression: Optional[str] = None
+        self._token_bundles: Dict[str, FrozenSet[str]] = {}
         # print(self.translator)
+        self.read_lines = ud_iterator
+        self.make_row = CoNLLRow.make
+        self.profile = Profile(profile) if profile is not None else None
+        self.splicer = Splicer(
+            self.translator, partial(self.translate, output_all=True)  # type: ignore
+        )
 
         if not replace_feats:
-            self.tags, self.lemmas = unimorph(self.um_file)
+            if self.profile is not None:
+                with self.profile.peak_memory("lexicon_load"):
+                    self._load_lexicon(lexicon_cache, lexicon_index)
+            else:
+                self._load_lexicon(lexicon_cache, lexicon_index)
+        if self.profile is not None:
+            self._instrument(self.profile)
+
+    def _load_lexicon(
+        self, lexicon_cache: Optional[Path], lexicon_index: Optional[Path]
+    ) -> None:
+        self.lexicon: Union[Lexicon, MappedLexicon]
+        if lexicon_index is not None:
+            self.lexicon = mapped_lexicon(self.um_file, lexicon_index)
+        else:
+            self.lexicon = load_lexicon(self.um_file, lexicon_cache)
+        self.tags, self.lemmas = self.lexicon.tags, self.lexicon.lemmas
+        if self.scoring == "lemma":
+            self.joint = self.lexicon.joint
+
+    def _instrument(self, profile: Profile) -> None:
+        # Shadow the stages with timed versions on this instance only.
+        self.read_lines = profile.wrap_iterator("read", self.read_lines)
+        self.make_row = profile.wrap("CoNLLRow.make", self.make_row)
+        self.score_translation = profile.wrap(  # type: ignore
+            "score_translation", self.score_translation
+        )
+        for t in self.translators:
+            prefix = f"{configuration_name(t)}." if len(self.translators) > 1 else ""
+            t.translate = profile.wrap(  # type: ignore
+                f"{prefix}translate", t.translate
+            )
+            t.basic_convert = profile.wrap(  # type: ignore
+                f"{prefix}basic_convert", t.basic_convert
+            )
+            t.lgspec_modify = profile.wrap(  # type: ignore
+                f"{prefix}lgspec_modify", t.lgspec_modify
+            )
 
     def translate(
         self, source: str, output_all=False
@@ -41,7 +211,7 @@ class EvaluationInstance:
                 return source
             else:
                 return None
-        record = CoNLLRow.make(source)
+        record = self.make_row(source)
         updated = self.translator.translate(record)
         if output_all:
             return "\t".join(updated)
@@ -49,30 +219,98 @@ class EvaluationInstance:
             return updated
 
     def evaluate(self) -> None:
+        print_configurations(self.translators)
         scores = []
         for file in self.ud_files:
-            score = self._evaluate(file)
+            score = self._evaluate_all(file)
             scores.append(score)
-            print(file.name, score)
-        # Calculate recall.
-        good_counts, counts = zip(*scores)
-        print(
-            f"Average for {self.language.name}:",
-            sum(good_counts) / (sum(counts) or 1) * 100,
-        )
+            print(file.name, *score)
+        print_average(self.language, scores)
 
     def convert(self) -> None:
         file: Path
         assert self.ud_files
         for file in self.ud_files:
             print(file)
-            lines: Iterable[str] = ud_iterator(file)
-            translations = [self.translate(line, output_all=True) for line in lines]
-            with open(output_filepath(file), "w", encoding="utf-8") as f:
-                for line in translations:
-                    print(line, file=f)
+            self.convert_file(file, output_filepath(file, self.compression))
+
+    @profiled("convert")
+    def convert_file(self, file: Path, output: Path) -> None:
+        # Plain files are mapped and rewritten in place of the FEATS column.
+        # The stages are timed on the text path, so profiling uses it instead.
+        if is_plain(file) and self.profile is None:
+            with replacing(output) as tmp:
+                with open_binary(tmp, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                    self.splicer.convert(file, f)
+            return
+        # Stream line by line; only the write buffer is held in memory.
+        lines: Iterable[str] = self.read_lines(file)
+        with replacing(output) as tmp:
+            with open_text(tmp, "w", buffering=WRITE_BUFFER_SIZE) as f:
+                writelines = f.writelines
+                if self.profile is not None:
+                    writelines = self.profile.wrap("write", writelines)
+                writelines(self.converted_lines(lines))
 
-    def score_translation(self, t: CoNLLRow) -> Tuple[int, int]:
+    def converted_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        return (f"{self.translate(line, output_all=True)}\n" for line in lines)
+
+    def score_translation(
+        self, t: CoNLLRow, translator: Optional[Translator] = None
+    ) -> Tuple[int, int]:
+        """Whether the lexicon lists the translated bundle for the form and lemma."""
+        if self.scoring != "lemma":
+            if self.scoring == "sets":
+                return self.score_translation_sets(t, translator)
+            return self.score_translation_forms(t, translator)
+        translator = translator or self.translator
+        # One lookup answers both whether the pair is known and what it allows.
+        bundle_ids = self.joint.get((t.form, t.lemma))
+        if bundle_ids is None:
+            return 0, 0
+        tag = t.misc
+        token_bundle = self._token_bundle(tag)
+        try:
+            translator.lgspec_assert(t, token_bundle)
+        except AssertionError:
+            return 0, 0
+        if self.lexicon.vocabulary.bundle_id(tag) in bundle_ids:
+            return 1, 1
+        return 0, 1
+
+    def score_translation_forms(
+        self, t: CoNLLRow, translator: Optional[Translator] = None
+    ) -> Tuple[int, int]:
+        """The form-level recall of the paper: any of the form's lemmas will do."""
+        translator = translator or self.translator
+        lexicon = self.lexicon
+        if t.form not in lexicon:
+            return 0, 0
+        tag = t.misc
+        if t.lemma not in self.lemmas[t.form]:
+            return 0, 0
+        token_bundle = self._token_bundle(tag)
+        try:
+            translator.lgspec_assert(t, token_bundle)
+        except AssertionError:
+            return 0, 0
+        # Bundles are compared as IDs of their feature masks, not as sets.
+        if lexicon.vocabulary.bundle_id(tag) in lexicon.bundle_ids(t.form):
+            return 1, 1
+        return 0, 1
+
+    def _token_bundle(self, tag: str) -> FrozenSet[str]:
+        try:
+            return self._token_bundles[tag]
+        except KeyError:
+            bundle = self._token_bundles[tag] = frozenset(tag.split(";"))
+            return bundle
+
+    def score_translation_sets(
+        self, t: CoNLLRow, translator: Optional[Translator] = None
+    ) -> Tuple[int, int]:
+        """The reference scoring, comparing bundles as sets of features."""
+        translator = translator or self.translator
         good_count = bad_count = count = 0
         try:
             tag = t.misc
@@ -80,19 +318,10 @@ class EvaluationInstance:
             token_bundle = set(tag.split(";"))
             type_bundles = self.tags[t.form]
             assert t.lemma in self.lemmas[t.form]
-            self.translator.lgspec_assert(t, token_bundle)
+            translator.lgspec_assert(t, token_bundle)
             if token_bundle in type_bundles:
                 good_count += 1
-                if self.print_good:
-                    cprint(
-                        f"{(t.form):20}\t{(';'.join(sorted(token_bundle))):20}\t{str([';'.join(sorted(tags)) for tags in type_bundles]):40}",
-                        "green",
-                    )
             else:
-                cprint(
-                    f"{(t.form):20}\t{(';'.join(sorted(token_bundle))):20}\t{str([';'.join(sorted(tags)) for tags in type_bundles]):40}",
-                    "red",
-                )
                 bad_count += 1
             count += 1
         except AssertionError:
@@ -100,32 +329,124 @@ class EvaluationInstance:
         assert good_count + bad_count == count
         return good_count, count
 
-    def recall(self, translations: List[CoNLLRow]) -> Tuple[int, int]:
-        good_count = count = 0
+    def recall(self, translations: Iterable[CoNLLRow]) -> Tuple[int, int]:
+        types: Dict[TokenType, List] = {}
         for translation in translations:
-            gc, c = self.score_translation(translation)
-            good_count += gc
-            count += c
+            count_type(types, translation)
+        return self.score_types(types)
+
+    def score_types(
+        self, types: Dict[TokenType, List], translator: Optional[Translator] = None
+    ) -> Tuple[int, int]:
+        """Score each token type once, weighted by how often it occurred."""
+        good_count = count = 0
+        for translation, n in types.values():
+            gc, c = self.score_translation(translation, translator)
+            good_count += gc * n
+            count += c * n
+            if self.mismatches is not None and c and (self.print_good or not gc):
+                self._count_mismatch(translation, translator, n, bool(gc))
         return good_count, count
 
+    def _count_mismatch(
+        self,
+        t: CoNLLRow,
+        translator: Optional[Translator],
+        n: int,
+        good: bool,
+    ) -> None:
+        assert self.mismatches is not None
+        configuration = configuration_name(translator or self.translator)
+        predicted = bundle_string(self._token_bundle(t.misc))
+        # The form-level scorings are blind to lemmas, so the report is too.
+        lemma = t.lemma if self.scoring == "lemma" else Lemma("_")
+        key = (self.language.name, configuration, t.form, lemma, predicted, good)
+        self.mismatches.add(key, n, lambda: self._lexicon_bundles(t.form, lemma))
+
+    def _lexicon_bundles(self, form: Form, lemma: Lemma) -> Tuple[str, ...]:
+        if self.scoring == "lemma":
+            bundles = self.lexicon.bundles
+            listed = [bundles[i] for i in self.joint[form, lemma]]
+        else:
+            listed = list(self.tags[form])
+        return tuple(sorted(map(bundle_string, listed)))
+
     def _evaluate(self, file: Path) -> Tuple[int, int]:
-        lines: Iterable[str] = ud_iterator(file)
-        maybe_translations: List[Optional[Union[CoNLLRow, str]]] = [
-            self.translate(line) for line in lines
-        ]
-        translations: List[CoNLLRow] = [
-            t for t in maybe_translations if isinstance(t, CoNLLRow)
-        ]
+        # Tokens are scored as they are read; only the running counts are kept.
+        lines: Iterable[str] = self.read_lines(file)
+        translations: Iterable[CoNLLRow] = (
+            t for t in map(self.translate, lines) if isinstance(t, CoNLLRow)
+        )
         recall = self.recall(translations)
         return recall
 
+    @profiled("evaluate")
+    def _evaluate_all(self, file: Path) -> List[Tuple[int, int]]:
+        """Score every configuration in `self.translators` in one pass."""
+        if len(self.translators) == 1:
+            return [self._evaluate(file)]
+        types: List[Dict[TokenType, List]] = [{} for _ in self.translators]
+        for line in self.read_lines(file):
+            if is_conll_useless(line):
+                continue
+            record = self.make_row(line)
+            for types_, translator in zip(types, self.translators):
+                count_type(types_, translator.translate(record))
+        return [
+            self.score_types(types_, translator)
+            for types_, translator in zip(types, self.translators)
+        ]
+
+
+def count_type(types: Dict[TokenType, List], translation: CoNLLRow) -> None:
+    # The first token of each type stands in for the others when scoring.
+    key = (translation.form, translation.lemma, translation.misc)
+    try:
+        types[key][1] += 1
+    except KeyError:
+        types[key] = [translation, 1]
+
+
+# What a score depends on besides the translator and the files; cached scores
+# are keyed by its source.
+SCORING_CODE = (EvaluationInstance, count_type, um_reader)
+
 
 class FileConverter(EvaluationInstance):
     """docstring for FileConverter"""
 
-    def __init__(self, file: Path, language: LanguageCoding, clever: bool) -> None:
-        super(FileConverter, self).__init__(language, clever, replace_feats=True)
+    def __init__(
+        self,
+        file: Path,
+        language: LanguageCoding,
+        clever: bool,
+        cache_size: int = 2 ** 16,
+        jobs: int = 1,
+        profile: Optional[Path] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        super(FileConverter, self).__init__(
+            language, clever, replace_feats=True, cache_size=cache_size, profile=profile
+        )
         self.ud_files = [file]
+        self.jobs = jobs
+        self.compression = compression
+
+    def convert_file(self, file: Path, output: Path) -> None:
+        # Stages are only timed in this process, so profiling runs serially.
+        # Compressed and archived input cannot be split into byte ranges.
+        if self.jobs <= 1 or self.profile is not None or not is_plain(file):
+            return super(FileConverter, self).convert_file(file, output)
+        # Translate sentence-aligned byte ranges in parallel, writing them back
+        # in file order.
+        unit = WorkUnit(self.language, (self.translator.clever,), self.um_file, file)
+        chunks = (
+            Chunk(unit, start, end) for start, end in sentence_chunks(file, CHUNK_SIZE)
+        )
+        fn = partial(_convert_chunk, cache_size=self.translator.cache.maxsize)
+        with replacing(output) as tmp:
+            with open_binary(tmp, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                f.writelines(run_units(fn, chunks, self.jobs))
 
 
 def parse_args() -> Namespace:
@@ -137,15 +458,44 @@ def parse_args() -> Namespace:
         "replicate", help="replicate experiments from McCarthy et al. (2018)"
     )
     # parser_a.add_argument('bar', type=int, help='bar help')
+    jobs_help = "worker processes to spread (language, file) units across"
+    cache_help = "distinct tag signatures to memoize per Translator (0 disables)"
+    replicate.add_argument("-j", "--jobs", type=int, default=1, help=jobs_help)
+    index_help = (
+        "look UniMorph up in memory-mapped indexes kept in this folder,"
+        " built beforehand by the index command"
+    )
+    replicate.add_argument("--lexicon_index", type=Path, help=index_help)
+    profile_help = "write per-stage timings for each file as JSON to this folder"
+    replicate.add_argument("--profile", type=Path, help=profile_help)
+    set_scoring_help = "compare feature bundles as sets (the paper's reference scoring)"
+    replicate.add_argument("--set_scoring", action="store_true", help=set_scoring_help)
+    no_cache_help = "recompute every result instead of reusing unchanged ones"
+    replicate.add_argument("--no_result_cache", action="store_true", help=no_cache_help)
+    mismatches_help = (
+        "write the mismatched tokens, counted once per form and predicted bundle,"
+        " to this TSV file (or JSON, if it ends in .json)"
+    )
+    replicate.add_argument("--mismatches", type=Path, help=mismatches_help)
+    show_help = "print the N most frequent mismatches of each configuration"
+    replicate.add_argument(
+        "--show_mismatches", type=int, default=0, metavar="N", help=show_help
+    )
 
     # create the parser for the "b" command
     evaluate = subparsers.add_parser("evaluate", help="evaluate a Translator class")
     evaluate.add_argument("-b", "--basic", action="store_true", help="dumb conversion?")
+    evaluate.add_argument(
+        "-c",
+        "--compare",
+        action="store_true",
+        help="score basic and clever conversion side by side in one pass",
+    )
     evaluate.add_argument(
         "-p",
         "--print_good",
         action="store_true",
-        help="Print good during evaluation, or only bad?",
+        help="count good tokens in the mismatch report too, or only bad?",
     )
     evaluate.add_argument(
         "-l",
@@ -154,6 +504,21 @@ def parse_args() -> Namespace:
         required=True,
         help='languages to convert (e.g. "da eu sp")',
     )
+    evaluate.add_argument("--cache_size", type=int, default=2 ** 16, help=cache_help)
+    evaluate.add_argument("-j", "--jobs", type=int, default=1, help=jobs_help)
+    evaluate.add_argument("--lexicon_index", type=Path, help=index_help)
+    evaluate.add_argument("--profile", type=Path, help=profile_help)
+    evaluate.add_argument("--set_scoring", action="store_true", help=set_scoring_help)
+    evaluate.add_argument(
+        "--form_scoring",
+        action="store_true",
+        help="accept a bundle listed for the form with any lemma, as in the paper",
+    )
+    evaluate.add_argument("--no_result_cache", action="store_true", help=no_cache_help)
+    evaluate.add_argument("--mismatches", type=Path, help=mismatches_help)
+    evaluate.add_argument(
+        "--show_mismatches", type=int, default=0, metavar="N", help=show_help
+    )
 
     # create the parser for the "b" command
     convert = subparsers.add_parser("convert", help="convert UD files to UniMorph")
@@ -161,78 +526,566 @@ def parse_args() -> Namespace:
     convert.add_argument(
         "--ud",
         type=Path,
-        help="UD file; warning: this will not use the clever converter",
+        help="UD file, or - to pipe from stdin to stdout; warning: this will not"
+        " use the clever converter",
     )
     convert.add_argument(
         "-l", "--langs", nargs="+", help='languages to convert (e.g. "da eu sp")'
     )
+    convert.add_argument("--cache_size", type=int, default=2 ** 16, help=cache_help)
+    convert.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=f"{jobs_help}; with --ud, the file is split at sentence boundaries",
+    )
+    convert.add_argument("--profile", type=Path, help=profile_help)
+    convert.add_argument("--no_result_cache", action="store_true", help=no_cache_help)
+    convert.add_argument(
+        "--compress",
+        choices=["gz", "xz", "bz2"],
+        help="write the converted files compressed",
+    )
+
+    export = subparsers.add_parser(
+        "export", help="compile each language's translations into lookup tables"
+    )
+    export.add_argument(
+        "-l", "--langs", nargs="+", required=True, help="languages to compile"
+    )
+    export.add_argument(
+        "--ud",
+        type=Path,
+        nargs="+",
+        help="UD files to scan instead of the language's treebank (one language)",
+    )
+    export.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["basic", "clever"],
+        default=["basic", "clever"],
+        help="conversions to compile a table for",
+    )
+    export.add_argument(
+        "-o", "--output", type=Path, required=True, help="folder to write tables to"
+    )
+    export.add_argument(
+        "--compress", choices=["gz", "xz", "bz2"], help="write the tables compressed"
+    )
+
+    index = subparsers.add_parser(
+        "index", help="build memory-mapped UniMorph indexes for --lexicon_index"
+    )
+    index.add_argument(
+        "-l", "--langs", nargs="+", required=True, help="languages to index"
+    )
+    index.add_argument(
+        "--lexicon_index",
+        type=Path,
+        required=True,
+        help="folder to keep the indexes in",
+    )
+
+    serve = subparsers.add_parser(
+        "serve", help="convert sentences sent over HTTP, keeping translators warm"
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    serve.add_argument("--socket", type=Path, help="listen on this Unix socket instead")
+    serve.add_argument(
+        "--preload",
+        action="store_true",
+        help="build every language's translators before serving",
+    )
+    serve.add_argument(
+        "--max_wait_ms",
+        type=float,
+        default=0.0,
+        help="how long to hold a request back to batch more with it",
+    )
+    serve.add_argument(
+        "--tables", type=Path, help="translate from the tables `export` wrote here"
+    )
+    serve.add_argument("--cache_size", type=int, default=2 ** 16, help=cache_help)
     return parser.parse_args()
 
 
-def replicate() -> None:
-    for language in languages:
-        cprint(language.name, attrs={"bold"})
-        for clever in [False, True]:
-            print("Clever? ", clever)
-            instance: EvaluationInstance = EvaluationInstance(language, clever)
-            instance.evaluate()
+def print_configurations(translators_: Sequence[Translator]) -> None:
+    if len(translators_) > 1:
+        print("Configurations:", *map(configuration_name, translators_))
 
 
-def evaluate(args: Namespace) -> None:
-    for language_ in args.langs:
-        language = get_lang(language_)
-        cprint(language.name, attrs={"bold"})
+def configuration_name(translator: Translator) -> str:
+    return f"{type(translator).__name__}({'clever' if translator.clever else 'basic'})"
 
-        clever = not args.basic
-        instance: EvaluationInstance = EvaluationInstance(
-            language, clever, print_good=args.print_good
-        )
-        instance.evaluate()
 
+def print_average(
+    language: LanguageCoding, scores: List[List[Tuple[int, int]]]
+) -> None:
+    # Calculate recall for each configuration.
+    averages = []
+    for configuration_scores in zip(*scores):
+        good_counts, counts = zip(*configuration_scores)
+        averages.append(sum(good_counts) / (sum(counts) or 1) * 100)
+    print(f"Average for {language.name}:", *averages)
 
-def convert(args: Namespace) -> None:
-    for language_ in args.langs:
-        language = get_lang(language_)
+
+class WorkUnit(NamedTuple):
+    """One UD file to process with one or more of a language's Translators."""
+
+    language: LanguageCoding
+    clevers: Tuple[bool, ...]
+    um_file: Path
+    file: Path
+
+
+def work_units(
+    languages_: Iterable[LanguageCoding], clevers: Sequence[bool], convert=False
+) -> List[WorkUnit]:
+    units: List[WorkUnit] = []
+    for language in languages_:
+        um_file, ud_files = FileGetter.get(language, convert)
+        units.extend(WorkUnit(language, tuple(clevers), um_file, f) for f in ud_files)
+    return units
+
+
+@lru_cache(maxsize=2)
+def _instance(
+    language: LanguageCoding,
+    clevers: Tuple[bool, ...],
+    um_file: Path,
+    replace_feats: bool,
+    print_good: bool,
+    cache_size: int,
+    lexicon_index: Optional[Path] = None,
+    profile: Optional[Path] = None,
+    scoring="lemma",
+) -> EvaluationInstance:
+    # Memoized so that a worker process loads each lexicon only once.
+    return EvaluationInstance(
+        language,
+        replace_feats=replace_feats,
+        print_good=print_good,
+        files=(um_file, []),
+        lexicon_index=lexicon_index,
+        profile=profile,
+        scoring=scoring,
+        translators=[
+            get_translator(language, clever, replace_feats, cache_size)
+            for clever in clevers
+        ],
+    )
+
+
+def _evaluation_instance(
+    unit: WorkUnit,
+    print_good=False,
+    cache_size: int = 2 ** 16,
+    lexicon_index: Optional[Path] = None,
+    profile: Optional[Path] = None,
+    scoring="lemma",
+) -> EvaluationInstance:
+    return _instance(
+        unit.language,
+        unit.clevers,
+        unit.um_file,
+        False,
+        print_good,
+        cache_size,
+        lexicon_index,
+        profile,
+        scoring,
+    )
+
+
+def _evaluate_unit(unit: WorkUnit, **options) -> List[Tuple[int, int]]:
+    return _evaluation_instance(unit, **options)._evaluate_all(unit.file)
+
+
+def _evaluate_unit_mismatches(
+    unit: WorkUnit, **options
+) -> Tuple[List[Tuple[int, int]], Mismatches]:
+    """Like `_evaluate_unit`, but also count the unit's mismatched tokens."""
+    instance = _evaluation_instance(unit, **options)
+    instance.mismatches = mismatches = Mismatches()
+    try:
+        return instance._evaluate_all(unit.file), mismatches
+    finally:
+        instance.mismatches = None
+
+
+def _convert_unit(
+    unit: WorkUnit,
+    cache_size: int = 2 ** 16,
+    profile: Optional[Path] = None,
+    compression: Optional[str] = None,
+) -> Path:
+    instance = _instance(
+        unit.language,
+        unit.clevers,
+        unit.um_file,
+        True,
+        False,
+        cache_size,
+        profile=profile,
+    )
+    output = output_filepath(unit.file, compression)
+    instance.convert_file(unit.file, output)
+    return output
+
+
+# What a conversion depends on besides the translator and the files; cached
+# conversions are keyed by its source.
+CONVERSION_CODE = (EvaluationInstance, _convert_unit, splice, streams)
+
+
+class Chunk(NamedTuple):
+    """A byte range of a UD file that starts and ends on sentence boundaries."""
+
+    unit: WorkUnit
+    start: int
+    end: int
+
+
+def _convert_chunk(chunk: Chunk, cache_size: int = 2 ** 16) -> bytes:
+    unit = chunk.unit
+    instance = _instance(
+        unit.language, unit.clevers, unit.um_file, True, False, cache_size
+    )
+    return instance.splicer.convert_bytes(unit.file, chunk.start, chunk.end)
+
+
+def run_units(fn: Callable[[U], T], units: Iterable[U], jobs: int = 1) -> Iterator[T]:
+    """Apply `fn` to each unit, yielding results in the order of `units`.
+
+    With several jobs, at most twice as many units as workers are in flight,
+    so results waiting to be consumed stay bounded.
+    """
+    if jobs <= 1:
+        yield from map(fn, units)
+        return
+    # Imported here: the process pool machinery is slow to import.
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    with ProcessPoolExecutor(jobs) as pool:
+        pending: Deque[Future] = deque()
+        for unit in units:
+            pending.append(pool.submit(fn, unit))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _by_language(
+    units: Sequence[WorkUnit], results: Iterable[T]
+) -> Iterator[Tuple[LanguageCoding, Iterator[Tuple[WorkUnit, T]]]]:
+    for language, group in groupby(zip(units, results), lambda ur: ur[0].language):
         cprint(language.name, attrs={"bold"})
+        yield language, group
 
-        clever = not args.basic
-        instance: EvaluationInstance = EvaluationInstance(
-            language, clever, replace_feats=True
-        )
-        instance.convert()
 
+def _report_scores(
+    units: Sequence[WorkUnit], scores: Iterable[List[Tuple[int, int]]]
+) -> None:
+    # Configurations are reported side by side, one column each.
+    for language, group in _by_language(units, scores):
+        language_scores: List[List[Tuple[int, int]]] = []
+        for unit, score in group:
+            if not language_scores:
+                print_configurations(
+                    [get_translator(unit.language, clever) for clever in unit.clevers]
+                )
+            language_scores.append(score)
+            print(unit.file.name, *score)
+        print_average(language, language_scores)
 
-def convert_file(args: Namespace) -> None:
+
+def _result_cache(args: Namespace) -> Optional[ResultCache]:
+    # A profile should time the real work, so profiling bypasses the cache.
+    if args.no_result_cache or args.profile is not None:
+        return None
+    return ResultCache(RESULT_CACHE_FOLDER)
+
+
+def _describe(unit: WorkUnit, clever: bool) -> str:
+    return f"{unit.file.name} ({'clever' if clever else 'basic'})"
+
+
+def cached_scores(
+    units: Sequence[WorkUnit],
+    fn: Callable[[WorkUnit], List[Tuple[int, int]]],
+    jobs: int,
+    cache: Optional[ResultCache],
+    scorer: str,
+) -> Iterator[List[Tuple[int, int]]]:
+    """Like `run_units`, but only score the configurations not in `cache`."""
+    if cache is None:
+        yield from run_units(fn, units, jobs)
+        return
+    code = source_digest(*SCORING_CODE)
+    keys = [
+        [
+            cache.evaluation_key(u.language, clever, u.um_file, u.file, scorer, code)
+            for clever in u.clevers
+        ]
+        for u in units
+    ]
+    found = [[cache.score(key) for key in unit_keys] for unit_keys in keys]
+    missing = [
+        u._replace(clevers=tuple(c for c, s in zip(u.clevers, f) if s is None))
+        for u, f in zip(units, found)
+        if None in f
+    ]
+    computed = run_units(fn, missing, jobs)
+    for unit, unit_keys, unit_found in zip(units, keys, found):
+        fresh = iter(next(computed) if None in unit_found else [])
+        scores = []
+        for clever, key, score in zip(unit.clevers, unit_keys, unit_found):
+            cache.record(_describe(unit, clever), reused=score is not None)
+            if score is None:
+                score = next(fresh)
+                cache.put_score(key, score)
+            scores.append(score)
+        yield scores
+
+
+def cached_conversions(
+    units: Sequence[WorkUnit],
+    fn: Callable[[WorkUnit], Path],
+    jobs: int,
+    cache: Optional[ResultCache],
+    compression: Optional[str] = None,
+) -> Iterator[Path]:
+    """Like `run_units`, but copy the conversions found in `cache` instead."""
+    if cache is None:
+        yield from run_units(fn, units, jobs)
+        return
+    code = source_digest(*CONVERSION_CODE)
+    keys = [
+        cache.conversion_key(u.language, u.clevers[0], u.file, compression, code)
+        for u in units
+    ]
+    found = [
+        cache.fetch_output(key, output_filepath(u.file, compression))
+        for u, key in zip(units, keys)
+    ]
+    computed = run_units(fn, [u for u, f in zip(units, found) if not f], jobs)
+    for unit, key, reused in zip(units, keys, found):
+        cache.record(_describe(unit, unit.clevers[0]), reused)
+        if reused:
+            yield output_filepath(unit.file, compression)
+        else:
+            output = next(computed)
+            cache.put_output(key, output)
+            yield output
+
+
+def _merge_mismatches(
+    results: Iterable[Tuple[List[Tuple[int, int]], Mismatches]],
+    mismatches: Mismatches,
+) -> Iterator[List[Tuple[int, int]]]:
+    for scores, unit_mismatches in results:
+        mismatches.update(unit_mismatches)
+        yield scores
+
+
+def score_units(
+    args: Namespace, units: Sequence[WorkUnit], scoring: str, **options
+) -> None:
+    """Score and report `units`, with `options` for `_evaluate_unit`."""
+    options["scoring"] = scoring
+    if args.mismatches is None and not args.show_mismatches:
+        fn = partial(_evaluate_unit, **options)
+        cache = _result_cache(args)
+        _report_scores(units, cached_scores(units, fn, args.jobs, cache, scoring))
+        if cache is not None:
+            cache.report()
+        return
+    # Mismatches are only counted while scoring, so cached scores are not reused.
+    mismatches = Mismatches()
+    counting_fn = partial(_evaluate_unit_mismatches, **options)
+    results = run_units(counting_fn, units, args.jobs)
+    _report_scores(units, _merge_mismatches(results, mismatches))
+    if args.mismatches is not None:
+        mismatches.write(args.mismatches)
+        print(f"Mismatches written to {args.mismatches}")
+    if args.show_mismatches:
+        mismatches.summarize(args.show_mismatches)
+
+
+def replicate(args: Namespace) -> None:
+    # Basic and clever are scored together, sharing the lexicon and the reads.
+    # The paper's numbers are form-level recall, so that is what is replicated.
+    units = work_units(languages, [False, True])
+    score_units(
+        args,
+        units,
+        "sets" if args.set_scoring else "form",
+        lexicon_index=args.lexicon_index,
+        profile=args.profile,
+    )
+
+
+def evaluate(args: Namespace) -> None:
+    clevers = [False, True] if args.compare else [not args.basic]
+    units = work_units(map(get_lang, args.langs), clevers)
+    scoring = "sets" if args.set_scoring else "form" if args.form_scoring else "lemma"
+    score_units(
+        args,
+        units,
+        scoring,
+        print_good=args.print_good,
+        cache_size=args.cache_size,
+        lexicon_index=args.lexicon_index,
+        profile=args.profile,
+    )
+
+
+def convert(args: Namespace) -> None:
+    clever = not args.basic
+    units = work_units(map(get_lang, args.langs), [clever], convert=True)
+    compression = f".{args.compress}" if args.compress else None
+    fn = partial(
+        _convert_unit,
+        cache_size=args.cache_size,
+        profile=args.profile,
+        compression=compression,
+    )
+    cache = _result_cache(args)
+    outputs = cached_conversions(units, fn, args.jobs, cache, compression)
+    for _, group in _by_language(units, outputs):
+        for unit, _ in group:
+            print(unit.file)
+    if cache is not None:
+        cache.report()
+
+
+def _file_language(args: Namespace, log: TextIO) -> LanguageCoding:
     assert not args.langs or len(args.langs) == 1
     if args.langs:
         try:
             [language_] = args.langs
             language = get_lang(language_)
         except KeyError:
-            cprint(f"Warning: no clever converter exists for {args.ud}", "cyan")
+            cprint(
+                f"Warning: no clever converter exists for {args.ud}", "cyan", file=log
+            )
             language = LanguageCoding(None, None, "")
     else:  # args.langs == None
-        cprint(f"Warning: no clever converter exists for {args.ud}", "cyan")
+        cprint(f"Warning: no clever converter exists for {args.ud}", "cyan", file=log)
         language = LanguageCoding(None, None, "")
-    cprint(language.name, attrs={"bold"})
+    cprint(language.name, attrs={"bold"}, file=log)
+    return language
+
+
+def convert_file(args: Namespace) -> None:
+    language = _file_language(args, sys.stdout)
     clever = not args.basic
 
-    instance: FileConverter = FileConverter(args.ud, language, clever)
+    instance: FileConverter = FileConverter(
+        args.ud,
+        language,
+        clever,
+        cache_size=args.cache_size,
+        jobs=args.jobs,
+        profile=args.profile,
+        compression=f".{args.compress}" if args.compress else None,
+    )
     instance.convert()
 
 
+def convert_pipe(args: Namespace) -> None:
+    """Convert CoNLL-U from stdin to stdout, handing on each sentence at once."""
+    if args.compress:
+        sys.exit("--compress cannot be used when writing to stdout")
+    language = _file_language(args, sys.stderr)
+    instance = EvaluationInstance(
+        language,
+        not args.basic,
+        replace_feats=True,
+        cache_size=args.cache_size,
+        files=(STDIO, []),
+    )
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="\n")
+    try:
+        for line in stdin:
+            line = line.strip()
+            stdout.write(f"{instance.translate(line, output_all=True)}\n")
+            if not line:
+                stdout.flush()
+        stdout.flush()
+    except BrokenPipeError:
+        # The reader has gone (e.g. `| head`); stop without a traceback.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def export(args: Namespace) -> None:
+    # Imported here: only this command compiles tables.
+    from .tables import export_table, table_path
+
+    if args.ud and len(args.langs) != 1:
+        sys.exit("--ud needs exactly one language")
+    compression = f".{args.compress}" if args.compress else None
+    for language in map(get_lang, args.langs):
+        cprint(language.name, attrs={"bold"})
+        files = args.ud or FileGetter.get(language, convert=True)[1]
+        if not files:
+            continue
+        for mode in args.modes:
+            output = table_path(args.output, language, mode == "clever", compression)
+            signatures = export_table(language, mode == "clever", files, output)
+            print(output, signatures, "signatures")
+
+
+def index(args: Namespace) -> None:
+    """Build the memory-mapped lexicon indexes that --lexicon_index reads."""
+    for language in map(get_lang, args.langs):
+        um_file = um_filepath(language)
+        built = update_index(um_file, args.lexicon_index, LEXICON_CACHE_FOLDER)
+        print(um_file, "indexed" if built else "already indexed")
+
+
+def serve(args: Namespace) -> None:
+    from .server import Pool, address, make_server
+
+    pool = Pool(args.cache_size, args.max_wait_ms / 1000, tables=args.tables)
+    if args.preload:
+        pool.preload()
+    server = make_server(pool, args.host, args.port, args.socket)
+    print(f"Serving on {address(server)}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 def main() -> None:
     args = parse_args()
-    print(args)
+    # When piping, stdout carries the converted corpus and nothing else.
+    piping = args.command == "convert" and args.ud == STDIO
+    print(args, file=sys.stderr if piping else sys.stdout)
     if args.command == "replicate":
-        replicate()
+        replicate(args)
     elif args.command == "evaluate":
         evaluate(args)
     elif args.command == "convert":
-        if args.ud:
+        if piping:
+            convert_pipe(args)
+        elif args.ud:
             convert_file(args)
         else:
             convert(args)
+    elif args.command == "export":
+        export(args)
+    elif args.command == "index":
+        index(args)
+    elif args.command == "serve":
+        serve(args)
     else:
         raise ValueError
 
@@ -0,0 +1,86 @@
+"""
+An aggregated report of the tokens whose conversion the lexicon rejects.
+
+Each mismatch is counted once per (language, configuration, form, lemma,
+predicted bundle), along with the bundles the lexicon lists for the form (and
+lemma, when scoring is lemma-aware; otherwise the lemma is "_"). Bundles are
+written with their features sorted, so that equal bundles look the same
+whichever process scored them. The report is written once, at the end, as TSV
+or (for a `.json` path) JSON; `summarize` prints the most frequent entries.
+"""
+
+import json
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from termcolor import cprint
+
+# language, configuration, form, lemma, predicted bundle, whether it matched
+MismatchKey = Tuple[str, str, str, str, str, bool]
+
+
+class Mismatch(NamedTuple):
+    language: str
+    configuration: str
+    form: str
+    lemma: str
+    predicted: str
+    good: bool
+    lexicon: Tuple[str, ...]
+    occurrences: int
+
+
+def bundle_string(features: Iterable[str]) -> str:
+    return ";".join(sorted(features))
+
+
+class Mismatches:
+    def __init__(self) -> None:
+        self.entries: Dict[MismatchKey, List] = {}  # [lexicon bundles, count]
+
+    def add(
+        self, key: MismatchKey, count: int, lexicon: Callable[[], Tuple[str, ...]]
+    ) -> None:
+        """Count `key` `count` more times; `lexicon` is only called for new keys."""
+        try:
+            self.entries[key][1] += count
+        except KeyError:
+            self.entries[key] = [lexicon(), count]
+
+    def update(self, other: "Mismatches") -> None:
+        for key, (lexicon, count) in other.entries.items():
+            self.add(key, count, lambda: lexicon)
+
+    def rows(self) -> List[Mismatch]:
+        """The entries of each language and configuration, most frequent first."""
+        rows = [
+            Mismatch(*key, lexicon, occurrences)  # type: ignore
+            for key, (lexicon, occurrences) in self.entries.items()
+        ]
+        rows.sort(key=lambda m: (m.language, m.configuration, -m.occurrences, m[2:6]))
+        return rows
+
+    def write(self, path: Path) -> None:
+        rows = self.rows()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.suffix == ".json":
+                json.dump([m._asdict() for m in rows], f, ensure_ascii=False, indent=1)
+                return
+            # Neither forms nor bundles contain tabs, so nothing needs quoting.
+            print(*Mismatch._fields, sep="\t", file=f)
+            for m in rows:
+                lexicon = " ".join(m.lexicon)
+                print(*m[:5], int(m.good), lexicon, m.occurrences, sep="\t", file=f)
+
+    def summarize(self, limit: int) -> None:
+        """Print the `limit` most frequent entries of each configuration."""
+        for (language, configuration), group in groupby(
+            self.rows(), lambda m: (m.language, m.configuration)
+        ):
+            cprint(f"{language} {configuration}", attrs={"bold"})
+            for m in islice(group, limit):
+                color = "green" if m.good else "red"
+                line = f"{m.occurrences:6}  {m.form:20}\t{m.lemma:20}\t{m.predicted:20}"
+                cprint(f"{line}\t{list(m.lexicon)}", color)
@@ -1,23 +1,51 @@
+import os
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from .languages import LanguageCoding
+from .streams import (
+    ARCHIVES,
+    COMPRESSIONS,
+    archive_members,
+    exists,
+    split_member,
+    strip_compression,
+)
 
 # These must be pathlib Path objects.
 # Easy way: Path('whatever/my/path/is')
 _ROOT = Path("/Users/arya/Desktop/UD_UM") / "data" / "raw"
 UM_FOLDER = _ROOT / "UM"
 UD_FOLDER = _ROOT / "UD"
-UD2UM_FILE = Path(".") / "UD-UniMorph.tsv"
+UD2UM_FILE = Path(__file__).with_name("UD-UniMorph.tsv")
+# Parsed UniMorph lexicons are cached here between runs.
+_DEFAULT_CACHE = Path.home() / ".cache" / "ud_compatibility"
+CACHE_FOLDER = Path(os.environ.get("UD_COMPATIBILITY_CACHE", _DEFAULT_CACHE))
+LEXICON_CACHE_FOLDER = CACHE_FOLDER / "lexicons"
+# Converted files and evaluation scores, keyed by the hashes of their inputs.
+RESULT_CACHE_FOLDER = CACHE_FOLDER / "results"
 
 
 class FileGetter:
     @staticmethod
     def get(language: LanguageCoding, convert=False) -> Tuple[Path, List[Path]]:
-        um_file = UM_FOLDER / f"{language.um}-master" / f"{language.um}"
+        um_file = um_filepath(language)
         lang_folder = UD_FOLDER / f"UD_{language.name}-master"
         print(lang_folder)
-        ud_files = list(lang_folder.glob(f"{language.ud}-ud-*.conllu"))
+        pattern = f"{language.ud}-ud-*.conllu"
+        # One file per treebank file: a plain copy is preferred to a compressed one.
+        found: Dict[str, Path] = {}
+        for suffix in ("", *COMPRESSIONS):
+            for file in sorted(lang_folder.glob(pattern + suffix)):
+                found.setdefault(strip_compression(file.name), file)
+        ud_files = [found[name] for name in sorted(found)]
+        if not ud_files:
+            # A downloaded archive of the treebank, read without extracting it.
+            for suffix in ARCHIVES:
+                archive = lang_folder.with_name(lang_folder.name + suffix)
+                if archive.is_file():
+                    ud_files = archive_members(archive, f"*{pattern}")
+                    break
         FileGetter._check_inputs(um_file, ud_files, convert)
         return um_file, ud_files
 
@@ -32,8 +60,29 @@ class FileGetter:
 
     @staticmethod
     def _validate_file(file: Path) -> None:
-        assert file.is_file(), file
+        assert exists(file), file
+
+
+def um_filepath(language: LanguageCoding) -> Path:
+    folder = UM_FOLDER / f"{language.um}-master"
+    plain = folder / f"{language.um}"
+    suffixes = ("", *COMPRESSIONS)
+    candidates = [plain.with_name(plain.name + suffix) for suffix in suffixes]
+    candidates += [
+        Path(f"{folder}{suffix}::{folder.name}/{plain.name}") for suffix in ARCHIVES
+    ]
+    for candidate in candidates:
+        if split_member(candidate)[0].is_file():
+            return candidate
+    return plain
+
 
+def output_filepath(conllu: Path, compression: Optional[str] = None) -> Path:
+    """Where to write the conversion of `conllu`, compressed if asked.
 
-def output_filepath(conllu: Path) -> Path:
-    return conllu.with_name(conllu.name.replace("-ud-", "-um-"))
+    Archive members are converted to files beside their archive.
+    """
+    archive, member = split_member(conllu)
+    folder = archive.parent if member is not None else conllu.parent
+    name = strip_compression(conllu.name).replace("-ud-", "-um-")
+    return folder / f"{name}{compression or ''}"
@@ -0,0 +1,103 @@
+"""
+Cheap per-stage timers for `marry.py --profile`.
+
+Stages are timed by wrapping the callables and iterators that implement them,
+so nothing is instrumented unless profiling was asked for. Each stage counts
+its calls and keeps both its total time and its own time, which excludes the
+stages nested inside it (e.g. `read` inside `write` when converting).
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+
+class Profile:
+    def __init__(self, folder: Path) -> None:
+        self.folder = folder
+        self.stages: Dict[str, List[float]] = {}  # [calls, total, own]
+        self.memory: Dict[str, Dict[str, float]] = {}
+        self._nested: List[float] = [0.0]
+
+    def reset(self) -> None:
+        self.stages.clear()
+
+    def _record(self, name: str, elapsed: float, nested: float) -> None:
+        stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+        stage[0] += 1
+        stage[1] += elapsed
+        stage[2] += elapsed - nested
+        self._nested[-1] += elapsed
+
+    def wrap(self, name: str, fn: Callable[..., T]) -> Callable[..., T]:
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            self._nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(name, time.perf_counter() - start, self._nested.pop())
+
+        return timed
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Time each step of `items`, counting one call per item."""
+        iterator = iter(items)
+        while True:
+            self._nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._nested.pop()
+                return
+            self._record(name, time.perf_counter() - start, self._nested.pop())
+            yield item
+
+    def wrap_iterator(
+        self, name: str, fn: Callable[..., Iterable[T]]
+    ) -> Callable[..., Iterator[T]]:
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            return self.iterate(name, fn(*args, **kwargs))
+
+        return timed
+
+    @contextmanager
+    def peak_memory(self, name: str) -> Iterator[None]:
+        """Record wall time and peak traced allocations of the block."""
+        tracing = tracemalloc.is_tracing()
+        if tracing and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()  # Python 3.9+; before, the peak may predate us.
+        else:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            self.memory[name] = {"seconds": seconds, "peak_bytes": peak}
+
+    def report(self, **fields: Any) -> Dict[str, Any]:
+        stages = {
+            name: {"calls": int(calls), "seconds": total, "own_seconds": own}
+            for name, (calls, total, own) in self.stages.items()
+        }
+        return {**fields, "stages": stages, "memory": self.memory}
+
+    def dump(self, name: str, **fields: Any) -> Path:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.folder / f"{name}.json"
+        with open(path, "w") as f:
+            json.dump(self.report(**fields), f, indent=2)
+        return path
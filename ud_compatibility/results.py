@@ -0,0 +1,197 @@
+"""
+A content-addressed cache of conversion outputs and evaluation scores.
+
+Each result is stored under a hash of everything it depends on: the contents
+of the UD file, of the UniMorph file (for scores), of `UD-UniMorph.tsv`, and
+the source of the `Translator` class and its bases, along with the modules
+that apply their rules, and the source of the code that writes conversions or
+scores them. Editing one language's translator thus recomputes only that
+language; touching a file without changing it recomputes nothing.
+
+Conversions are stored as hard links to the output files where possible, so
+caching them takes no extra space. A stored conversion whose size or mtime has
+changed since, say because its output was edited in place, is not reused.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+from . import converter, rules
+from .languages import LanguageCoding
+from .paths import UD2UM_FILE
+from .streams import replacing, split_member
+from .translator import Translator, translator_class
+
+RESULT_CACHE_VERSION = 1
+
+Score = Tuple[int, int]
+
+
+def file_digest(fname: Path) -> str:
+    stored, member = split_member(fname)
+    stat = stored.stat()
+    digest = _file_digest(str(stored.resolve()), stat.st_size, stat.st_mtime_ns)
+    if member is not None:
+        # The members of an archive share its hash; their names tell them apart.
+        digest = _key(digest, member)
+    return digest
+
+
+@lru_cache(maxsize=None)
+def _file_digest(fname: str, size: int, mtime_ns: int) -> str:
+    # Keyed by size and mtime too, so a file changed mid-run is rehashed.
+    digest = hashlib.sha256()
+    with open(fname, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_translator_digests: Dict[Type[Translator], str] = {}
+
+
+def translator_digest(cls: Type[Translator]) -> str:
+    try:
+        return _translator_digests[cls]
+    except KeyError:
+        pass
+    # Imported here: `inspect` is slow to import and only needed for caching.
+    import inspect
+
+    digest = hashlib.sha256()
+    for base in cls.__mro__:
+        if issubclass(base, Translator):
+            digest.update(inspect.getsource(base).encode("utf-8"))
+    for module in (converter, rules):
+        digest.update(inspect.getsource(module).encode("utf-8"))
+    found = _translator_digests[cls] = digest.hexdigest()
+    return found
+
+
+@lru_cache(maxsize=None)
+def source_digest(*objects: object) -> str:
+    """A hash of the source of each of `objects`: modules, classes or functions."""
+    import inspect
+
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode("utf-8"))  # type: ignore
+    return digest.hexdigest()
+
+
+def _key(*parts: object) -> str:
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Stored results, and a record of which were reused or recomputed."""
+
+    def __init__(self, folder: Path) -> None:
+        self.folder = folder
+        self.reused: List[str] = []
+        self.recomputed: List[str] = []
+
+    def _conversion_parts(
+        self, language: LanguageCoding, clever: bool, ud_file: Path
+    ) -> List[object]:
+        return [
+            RESULT_CACHE_VERSION,
+            language.name,
+            clever,
+            translator_digest(translator_class(language)),
+            file_digest(UD2UM_FILE),
+            file_digest(ud_file),
+        ]
+
+    def conversion_key(
+        self,
+        language: LanguageCoding,
+        clever: bool,
+        ud_file: Path,
+        compression: Optional[str],
+        conversion_digest: str,
+    ) -> str:
+        parts = self._conversion_parts(language, clever, ud_file)
+        return _key("convert", *parts, compression, conversion_digest)
+
+    def evaluation_key(
+        self,
+        language: LanguageCoding,
+        clever: bool,
+        um_file: Path,
+        ud_file: Path,
+        scorer: str,
+        scoring_digest: str,
+    ) -> str:
+        parts = self._conversion_parts(language, clever, ud_file)
+        return _key("evaluate", *parts, file_digest(um_file), scorer, scoring_digest)
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.folder / f"{key}{suffix}"
+
+    def _store(self, source: Path, destination: Path) -> None:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with replacing(destination) as tmp:
+            try:
+                os.link(source, tmp)
+            except OSError:  # On another file system, say.
+                shutil.copyfile(source, tmp)
+
+    @staticmethod
+    def _stamp(path: Path) -> List[int]:
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def score(self, key: str) -> Optional[Score]:
+        try:
+            with open(self._path(key, ".json")) as f:
+                good, count = json.load(f)["score"]
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+        return good, count
+
+    def put_score(self, key: str, score: Score) -> None:
+        path = self._path(key, ".json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"score": list(score)}, f)
+        os.replace(tmp, path)
+
+    def fetch_output(self, key: str, output: Path) -> bool:
+        """Link or copy the stored conversion to `output`, if it is intact."""
+        stored = self._path(key, ".conllu")
+        try:
+            with open(self._path(key, ".stamp")) as f:
+                intact = json.load(f) == self._stamp(stored)
+        except (OSError, ValueError):
+            return False
+        if intact:
+            self._store(stored, output)
+        return intact
+
+    def put_output(self, key: str, output: Path) -> None:
+        stored = self._path(key, ".conllu")
+        self._store(output, stored)
+        stamp = self._path(key, ".stamp")
+        with replacing(stamp) as tmp:
+            with open(tmp, "w") as f:
+                json.dump(self._stamp(stored), f)
+
+    def record(self, description: str, reused: bool) -> None:
+        (self.reused if reused else self.recomputed).append(description)
+
+    def report(self) -> None:
+        print(
+            f"Result cache: reused {len(self.reused)},"
+            f" recomputed {len(self.recomputed)}"
+        )
+        for description in self.reused:
+            print(f"  reused      {description}")
+        for description in self.recomputed:
+            print(f"  recomputed  {description}")
@@ -0,0 +1,113 @@
+"""
+Declarative language-specific rewrites of UniMorph bundles.
+
+A `Translator` lists its `rules` as a table. Each `Rule` is tested against
+the bundle as left by the rules before it, and when every condition holds,
+its actions are applied: `become` replaces the whole bundle, otherwise the
+features in `discard` are removed and then those in `add` are added. Features
+are written as in UniMorph, separated by ";":
+
+    Rule(has="V;PST", lacks="IPFV", add="PFV")
+    Rule(equals="V;V.MSDR", become="PRS;V.PTCP")
+    Rule(exceeds="IPFV;SBJV", suffix=("ra", "ran"), add="LGSPEC1")
+
+`exceeds` holds when the bundle is a proper superset of the given features.
+`suffix` holds when the word form ends with any of the given strings.
+`RuleSet` compiles a table once into a single generated function of set
+operations. Constant feature sets are built at compile time rather than on
+every call, and single features are tested with plain membership.
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+GENDERS = "MASC;FEM;NEUT;{MASC/NEUT}"
+
+
+class Rule(NamedTuple):
+    has: str = ""
+    lacks: str = ""
+    equals: Optional[str] = None
+    exceeds: Optional[str] = None
+    suffix: Tuple[str, ...] = ()
+    discard: str = ""
+    add: str = ""
+    become: Optional[str] = None
+
+
+def _feats(feats: Optional[str]) -> FrozenSet[str]:
+    return frozenset(f for f in (feats or "").split(";") if f)
+
+
+class RuleSet:
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = list(rules)
+        self.constants: Dict[str, Any] = {}
+        self.source = self._generate(self.rules)
+        exec(self.source, self.constants)
+        self.apply: Callable[[str, str], str] = self.constants.pop("apply")
+
+    def _constant(self, value: Any) -> str:
+        # Feature sets are built once and named in the generated code.
+        name = f"C{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def _contains(self, feats: FrozenSet[str]) -> str:
+        if len(feats) == 1:
+            return f"{next(iter(feats))!r} in tags"
+        return f"{self._constant(feats)} <= tags"
+
+    def _generate(self, rules: Sequence[Rule]) -> str:
+        # Each rule becomes one `if`, as a hand-written `lgspec_modify` would
+        # have it.
+        lines = ["def apply(form, um):", '    tags = set(um.split(";"))']
+        for rule in rules:
+            conditions = []
+            if rule.has:
+                conditions.append(self._contains(_feats(rule.has)))
+            for feat in sorted(_feats(rule.lacks)):
+                conditions.append(f"{feat!r} not in tags")
+            if rule.equals is not None:
+                conditions.append(f"tags == {self._constant(_feats(rule.equals))}")
+            if rule.exceeds is not None:
+                conditions.append(f"{self._constant(_feats(rule.exceeds))} < tags")
+            if rule.suffix:
+                conditions.append(f"form.endswith({tuple(rule.suffix)!r})")
+            indent = "    "
+            if conditions:
+                lines.append(f"    if {' and '.join(conditions)}:")
+                indent = "        "
+            lines.extend(indent + action for action in self._actions(rule))
+        lines.append('    return ";".join(tags)')
+        return "\n".join(lines) + "\n"
+
+    def _actions(self, rule: Rule) -> List[str]:
+        if rule.become is not None:
+            return [f"tags = set({self._constant(_feats(rule.become))})"]
+        actions = []
+        discard, add = _feats(rule.discard), _feats(rule.add)
+        if len(discard) == 1:
+            actions.append(f"tags.discard({next(iter(discard))!r})")
+        elif discard:
+            actions.append(f"tags -= {self._constant(discard)}")
+        if len(add) == 1:
+            actions.append(f"tags.add({next(iter(add))!r})")
+        elif add:
+            actions.append(f"tags |= {self._constant(add)}")
+        return actions or ["pass"]
+
+    @property
+    def suffix_length(self) -> Optional[int]:
+        """How many trailing characters of the form the rules can look at."""
+        lengths = [len(s) for rule in self.rules for s in rule.suffix]
+        return max(lengths) if lengths else None
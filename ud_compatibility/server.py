@@ -0,0 +1,233 @@
+"""
+A long-running conversion server that keeps translators and their caches warm.
+
+It listens on localhost HTTP, or on a Unix socket, for POST requests to
+`/convert` whose JSON body names a language and gives sentences of CoNLL-U
+lines (as lists of lines or as text blocks):
+
+    {"language": "es", "clever": true, "sentences": ["1\\tTiene\\t..."]}
+
+The reply lists the converted lines of each sentence, in order:
+
+    {"sentences": [["1\\tTiene\\t...PRS;V;FIN;3;IND;SG\\t..."]]}
+
+Each (language, clever) pair has one worker thread that owns its translator.
+Requests that arrive while the worker is busy are converted together as one
+batch; `max_wait` can hold the first request back a little to gather more.
+`GET /stats` reports the cache statistics of every translator built so far.
+Given a folder of tables from `marry.py export`, translators look signatures
+up in them before applying any rules.
+"""
+
+import json
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Any, Dict, List, Optional, Tuple
+
+from .batch import BatchTranslator, Sentence
+from .languages import get_lang, languages
+from .tables import load_translator
+from .translator import compiled_converter
+
+Job = Tuple[List[Sentence], "Future[List[List[str]]]"]
+
+
+class _Worker:
+    """Converts the queued requests for one translator, a batch at a time."""
+
+    def __init__(self, translator: BatchTranslator, max_wait: float, max_batch: int):
+        self.translator = translator
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.queue: "Queue[Job]" = Queue()
+        self.batches = 0
+        self.requests = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, sentences: List[Sentence]) -> List[List[str]]:
+        future: "Future[List[List[str]]]" = Future()
+        self.queue.put((sentences, future))
+        return future.result()
+
+    def _collect(self) -> List[Job]:
+        jobs = [self.queue.get()]
+        size = len(jobs[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                job = self.queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except Empty:
+                break
+            jobs.append(job)
+            size += len(job[0])
+        return jobs
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._collect()
+            sentences = [sentence for job in jobs for sentence in job[0]]
+            try:
+                translated = [
+                    sentence
+                    for batch in self.translator.translate_sentences(
+                        sentences, batch_size=len(sentences) or 1
+                    )
+                    for sentence in batch
+                ]
+            except Exception as e:  # Hand the error to every waiting request.
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(jobs)
+            start = 0
+            for job, future in jobs:
+                future.set_result(translated[start : start + len(job)])
+                start += len(job)
+
+
+class Pool:
+    """The workers, built on first use unless preloaded."""
+
+    def __init__(
+        self,
+        cache_size: int = 2 ** 16,
+        max_wait: float = 0.0,
+        max_batch=256,
+        tables: Optional[Path] = None,
+    ) -> None:
+        self.cache_size = cache_size
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        # Where to find compiled tables; languages without one use their rules.
+        self.tables = tables
+        self.workers: Dict[Tuple[str, bool], _Worker] = {}
+        self._lock = threading.Lock()
+
+    def worker(self, language: str, clever: bool) -> _Worker:
+        key = (language, clever)
+        with self._lock:
+            if key not in self.workers:
+                language_ = get_lang(language)
+                translator = BatchTranslator(
+                    language_,
+                    translator=load_translator(
+                        language_, clever, True, self.cache_size, self.tables
+                    ),
+                )
+                self.workers[key] = _Worker(translator, self.max_wait, self.max_batch)
+            return self.workers[key]
+
+    def preload(self) -> None:
+        compiled_converter()
+        for language in languages:
+            for clever in (False, True):
+                self.worker(language.ud, clever)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            f"{language}:{'clever' if clever else 'basic'}": {
+                "requests": worker.requests,
+                "batches": worker.batches,
+                "cache": worker.translator.translator.cache.stats(),
+            }
+            for (language, clever), worker in sorted(self.workers.items())
+        }
+
+
+def _is_sentence(sentence: Any) -> bool:
+    """Whether `sentence` is a text block or a list of lines."""
+    if isinstance(sentence, list):
+        return all(isinstance(line, str) for line in sentence)
+    return isinstance(sentence, str)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Any
+    # Keep connections open between requests from the same client, and send
+    # each small reply at once rather than waiting for the client's ACK.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/stats":
+            self._reply(200, self.server.pool.stats())
+        else:
+            self._reply(404, {"error": f"no such path: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/convert":
+            self._reply(404, {"error": f"no such path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(request, dict):
+                raise TypeError("the request must be a JSON object")
+            clever = request.get("clever", True)
+            if not isinstance(clever, bool):
+                raise TypeError("clever must be true or false")
+            sentences = request["sentences"]
+            if not isinstance(sentences, list) or not all(
+                map(_is_sentence, sentences)
+            ):
+                raise TypeError("sentences must be a list of strings or lists of them")
+            worker = self.server.pool.worker(request["language"], clever)
+        except (KeyError, TypeError, ValueError) as e:
+            self._reply(400, {"error": f"bad request: {e!r}"})
+            return
+        try:
+            translated = worker.submit(sentences)
+        except Exception as e:
+            self._reply(500, {"error": repr(e)})
+            return
+        self._reply(200, {"sentences": translated})
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address.
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    pool: Pool, host="127.0.0.1", port=0, socket: Optional[Path] = None
+) -> socketserver.BaseServer:
+    server: Any
+    if socket is not None:
+        # Only a stale socket is ours to replace; never remove anything else.
+        if socket.exists() or socket.is_symlink():
+            if not stat.S_ISSOCK(socket.lstat().st_mode):
+                raise FileExistsError(f"{socket} exists and is not a socket")
+            socket.unlink()
+        server = _UnixHTTPServer(str(socket), Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), Handler)
+    server.pool = pool
+    return server
+
+
+def address(server: socketserver.BaseServer) -> str:
+    if isinstance(server, _UnixHTTPServer):
+        return f"unix:{server.server_address}"
+    host, port = server.server_address[:2]  # type: ignore
+    return f"http://{host}:{port}"
@@ -0,0 +1,161 @@
+"""
+Convert CoNLL-U at the byte level, over a memory-mapped file.
+
+A converted file differs from its input only in the FEATS (or MISC) column of
+token lines. So `Splicer` copies the input through as slices of the mapping,
+and for each token line only searches for the tabs around the columns it
+needs, splicing the translation in between them. Translations are cached by
+the same signature as the translator's and bounded by the same size. Lines are
+never copied or split, and other columns, comments and blank lines are never
+decoded.
+
+Lines that the text path would change in other ways go through it instead:
+lines with a carriage return, and lines with whitespace at either end, which
+it strips. The output is the same as the text path's, byte for byte.
+"""
+
+import io
+import mmap
+import os
+from pathlib import Path
+from typing import IO, Callable, List, Optional, Tuple, Union
+
+from .translator import TranslationCache, Translator
+from .utils import CoNLLRow
+
+Piece = Union[bytes, memoryview]
+
+# The ASCII bytes that `str.strip` removes.
+_WHITESPACE = frozenset(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+_COMMENT = ord("#")
+# The bytes that continue, rather than start, a UTF-8 character.
+_CONTINUATION = bytes(range(0x80, 0xC0))
+# How many pieces to gather per write.
+BATCH_PIECES = 8192
+
+
+def _strips(line: bytes) -> bool:
+    """Whether `line.decode().strip()` would differ from `line`."""
+    text = line.decode("utf-8")
+    return text != text.strip()
+
+
+class Splicer:
+    def __init__(self, translator: Translator, translate_line: Callable[[str], str]):
+        self.translator = translator
+        # The text path, for lines that cannot be copied through.
+        self.translate_line = translate_line
+        self.column = 5 if translator.replace_feats else 9
+        suffix = translator.form_suffix if translator.clever else None
+        self.suffix = suffix or 0
+        # The last n characters of a form lie within its last 4n bytes.
+        self.suffix_bytes = 4 * self.suffix
+        # Keyed by (UPOS, FEATS, form suffix) like the translator's own cache,
+        # with the columns left as bytes, and bounded by the same --cache_size.
+        self.tags = TranslationCache(translator.cache.maxsize)
+
+    def _translate(self, key: Tuple[bytes, bytes, str], line: bytes) -> bytes:
+        """Translate the token `line`, whose signature `key` was not cached."""
+        record = CoNLLRow.make(line.decode("utf-8"))
+        tag = self.translator.translate_tag(record)
+        self.tags.put(key, tag)
+        return tag.encode("utf-8")
+
+    def _text_path(self, data: bytes) -> bytes:
+        # Split as text mode would, so a lone "\r" ends a line too.
+        with io.StringIO(data.decode("utf-8"), newline=None) as lines:
+            converted = [f"{self.translate_line(line.strip())}\n" for line in lines]
+        return "".join(converted).encode("utf-8")
+
+    def _write(self, mm: mmap.mmap, start: int, end: int, output: IO[bytes]) -> None:
+        """Write the conversion of the whole lines in bytes `start:end` of `mm`."""
+        find, misc, tags = mm.find, self.column == 9, self.tags
+        suffix, suffix_bytes = self.suffix, self.suffix_bytes
+        carriage_returns = find(b"\r", start, end) >= 0
+        view = memoryview(mm)
+        pieces: List[Piece] = []
+        # Slices of `mm` must all be gone, even on error, before it is closed.
+        try:
+            copied = pos = start
+            while pos < end:
+                stop = find(b"\n", pos, end)
+                if stop < 0:
+                    stop = end
+                if stop == pos:
+                    pos += 1
+                    continue
+                first, last = mm[pos], mm[stop - 1]
+                if (
+                    first in _WHITESPACE
+                    or last in _WHITESPACE
+                    or (first >= 0x80 or last >= 0x80)
+                    and _strips(mm[pos:stop])
+                    or carriage_returns
+                    and find(b"\r", pos, stop) >= 0
+                ):
+                    pieces.append(view[copied:pos])
+                    pieces.append(self._text_path(mm[pos:stop] + b"\n"))
+                    pos = stop + 1
+                    copied = min(pos, end)
+                    continue
+                if first != _COMMENT:
+                    # Only the tabs up to FEATS are looked for, and MISC's
+                    # when it is the column; the others are just counted.
+                    t1 = find(b"\t", pos, stop)
+                    t2 = find(b"\t", t1 + 1, stop)
+                    t3 = find(b"\t", t2 + 1, stop)
+                    t4 = find(b"\t", t3 + 1, stop)
+                    t5 = find(b"\t", t4 + 1, stop)
+                    t6 = find(b"\t", t5 + 1, stop)
+                    if not pos <= t1 < t2 < t3 < t4 < t5 < t6 or (
+                        mm[t6 + 1 : stop].count(b"\t") != 3
+                    ):
+                        # Fails as the text path would.
+                        CoNLLRow.make(mm[pos:stop].decode("utf-8"))
+                    ending = ""
+                    if suffix:
+                        cut = max(t2 - suffix_bytes, t1 + 1)
+                        tail = mm[cut:t2]
+                        if cut > t1 + 1:
+                            # The cut may split a character; drop what is left of it.
+                            tail = tail.lstrip(_CONTINUATION)
+                        ending = tail.decode("utf-8")[-suffix:]
+                    key = (mm[t3 + 1 : t4], mm[t5 + 1 : t6], ending)
+                    tag = tags.get(key)
+                    if misc:
+                        offset, field_end = mm.rfind(b"\t", t6, stop) + 1, stop
+                    else:
+                        offset, field_end = t5 + 1, t6
+                    pieces.append(view[copied:offset])
+                    if tag is None:
+                        pieces.append(self._translate(key, mm[pos:stop]))
+                    else:
+                        pieces.append(tag.encode("utf-8"))
+                    copied = field_end
+                    if len(pieces) >= BATCH_PIECES:
+                        output.writelines(pieces)
+                        pieces.clear()
+                pos = stop + 1
+            pieces.append(view[copied:end])
+            if end > start and mm[end - 1] != ord("\n"):
+                pieces.append(b"\n")  # The text path ends every line, even the last.
+            output.writelines(pieces)
+        finally:
+            pieces.clear()
+            view.release()
+
+    def convert(
+        self, file: Path, output: IO[bytes], start=0, end: Optional[int] = None
+    ) -> None:
+        """Write the conversion of bytes `start:end` of `file` to `output`."""
+        with open(file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return  # Empty files cannot be mapped.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self._write(mm, start, size if end is None else end, output)
+
+    def convert_bytes(self, file: Path, start=0, end: Optional[int] = None) -> bytes:
+        output = io.BytesIO()
+        self.convert(file, output, start, end)
+        return output.getvalue()
@@ -0,0 +1,158 @@
+"""
+Read and write text that may be compressed or stored in an archive.
+
+Files ending in `.gz`, `.xz` or `.bz2` are decompressed on the fly, and so
+are written compressed. A member of a tar or zip archive is named by the
+archive's path, `::`, and the member's name inside it:
+
+    UD_Spanish-master.zip::UD_Spanish-master/es-ud-train.conllu
+
+Such paths keep the member's file name, so `Path.name` and friends still
+work on them. Nothing is extracted to disk.
+"""
+
+import io
+import os
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+
+MEMBER_SEPARATOR = "::"
+COMPRESSIONS = (".gz", ".xz", ".bz2")
+ARCHIVES = (".zip", ".tar", ".tgz", ".tar.gz", ".tar.xz", ".tar.bz2")
+
+
+def split_member(path: Path) -> Tuple[Path, Optional[str]]:
+    """The file on disk that holds `path`, and the archive member, if any."""
+    archive, separator, member = str(path).partition(MEMBER_SEPARATOR)
+    return Path(archive), (member if separator else None)
+
+
+def stored_file(path: Path) -> Path:
+    """The file on disk to stat or hash for `path`."""
+    return split_member(path)[0]
+
+
+def compression(path: Path) -> Optional[str]:
+    return path.suffix if path.suffix in COMPRESSIONS else None
+
+
+def is_plain(path: Path) -> bool:
+    """Whether `path` is an uncompressed file, which can be seeked and mapped."""
+    return split_member(path)[1] is None and compression(path) is None
+
+
+def strip_compression(name: str) -> str:
+    for suffix in COMPRESSIONS:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def _open_compressed(path: Path, mode: str, buffering: int = -1) -> IO[bytes]:
+    # Imported here: most runs read plain files only.
+    suffix = compression(path)
+    if suffix == ".gz":
+        import gzip
+
+        return gzip.open(path, mode)  # type: ignore
+    if suffix == ".xz":
+        import lzma
+
+        return lzma.open(path, mode)  # type: ignore
+    if suffix == ".bz2":
+        import bz2
+
+        return bz2.open(path, mode)  # type: ignore
+    return open(path, mode, buffering=buffering)
+
+
+@contextmanager
+def _open_member(archive: Path, member: str) -> Iterator[IO[bytes]]:
+    if archive.suffix == ".zip":
+        import zipfile
+
+        with zipfile.ZipFile(archive) as z, z.open(member) as f:
+            yield f
+    else:
+        import tarfile
+
+        with tarfile.open(archive, "r:*") as tar:
+            extracted = tar.extractfile(member)
+            if extracted is None:
+                raise IsADirectoryError(f"{archive}{MEMBER_SEPARATOR}{member}")
+            with extracted:
+                yield extracted
+
+
+@contextmanager
+def open_binary(
+    path: Path, mode: str = "rb", buffering: int = -1
+) -> Iterator[IO[bytes]]:
+    archive, member = split_member(path)
+    if member is None:
+        with _open_compressed(path, mode, buffering) as f:
+            yield f
+    elif "r" not in mode:
+        raise ValueError(f"cannot write into an archive: {path}")
+    else:
+        with _open_member(archive, member) as f:
+            yield f
+
+
+@contextmanager
+def open_text(path: Path, mode: str = "r", buffering: int = -1) -> Iterator[IO[str]]:
+    """`open(path, mode, encoding="utf-8")`, for any of the paths above."""
+    if is_plain(path):
+        with open(path, mode, buffering=buffering, encoding="utf-8") as f:
+            yield f
+        return
+    with open_binary(path, mode.replace("t", "") + "b") as raw:
+        with io.TextIOWrapper(raw, encoding="utf-8") as f:  # type: ignore
+            yield f
+
+
+@contextmanager
+def replacing(path: Path) -> Iterator[Path]:
+    """A temporary name beside `path`, moved over `path` once it is written.
+
+    So readers never see a partial file, and an input may be converted into
+    its own name: it is only replaced once it has been read in full.
+    """
+    # The name keeps its suffix, which tells `open_binary` how to compress.
+    tmp = path.with_name(f".{os.getpid()}.tmp.{path.name}")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def archive_members(archive: Path, pattern: str) -> List[Path]:
+    """The members of `archive` whose names match the glob `pattern`."""
+    if archive.suffix == ".zip":
+        import zipfile
+
+        with zipfile.ZipFile(archive) as z:
+            names = [i.filename for i in z.infolist() if not i.is_dir()]
+    else:
+        import tarfile
+
+        with tarfile.open(archive, "r:*") as tar:
+            names = [m.name for m in tar.getmembers() if m.isfile()]
+    return [
+        Path(f"{archive}{MEMBER_SEPARATOR}{name}")
+        for name in sorted(names)
+        if fnmatch(name, pattern)
+    ]
+
+
+def exists(path: Path) -> bool:
+    archive, member = split_member(path)
+    if member is None:
+        return path.is_file()
+    return archive.is_file() and bool(archive_members(archive, member))
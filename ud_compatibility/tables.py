@@ -0,0 +1,158 @@
+"""
+Compiled translation tables: every tag signature seen in a corpus, translated.
+
+`export_table` scans UD files for the distinct signatures a `Translator` keys
+its cache on, (UPOS, FEATS) or (UPOS, FEATS, form suffix), translates each
+once and writes them as TSV after a JSON header line:
+
+    # {"version": 1, "language": "es", "clever": true, "form_suffix": 3, ...}
+    VERB	Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin	ene	PRS;V;IND;3;SG
+
+`LookupTranslator` loads a table and translates known signatures with a
+single dict lookup, falling back to the language's rules for the rest. A
+table records hashes of the rules and of `UD-UniMorph.tsv` it was compiled
+from, and is refused once either changes.
+"""
+
+import json
+from pathlib import Path
+from typing import AbstractSet, Dict, Iterable, Optional, Tuple
+
+from .languages import LanguageCoding, get_lang
+from .paths import UD2UM_FILE
+from .results import file_digest, translator_digest
+from .streams import COMPRESSIONS, open_text
+from .translator import Translator, get_translator, translator_class
+from .utils import CoNLLRow, UmTag, is_conll_useless, ud_iterator
+
+TABLE_VERSION = 1
+
+Table = Dict[Tuple[str, ...], UmTag]
+
+
+def table_path(
+    folder: Path,
+    language: LanguageCoding,
+    clever: bool,
+    compression: Optional[str] = None,
+) -> Path:
+    name = f"{language.ud}-{'clever' if clever else 'basic'}.tsv"
+    return folder / f"{name}{compression or ''}"
+
+
+def collect_signatures(translator: Translator, files: Iterable[Path]) -> Table:
+    """Translate each distinct signature in `files`, once."""
+    table: Table = {}
+    for file in files:
+        for line in ud_iterator(file):
+            if is_conll_useless(line):
+                continue
+            record = CoNLLRow.make(line)
+            key = translator.cache_key(record)
+            if key not in table:
+                table[key] = translator.translate_tag(record)
+    return table
+
+
+def write_table(
+    path: Path, language: LanguageCoding, translator: Translator, table: Table
+) -> None:
+    header = {
+        "version": TABLE_VERSION,
+        "language": language.ud,
+        "clever": bool(translator.clever),
+        "form_suffix": translator.form_suffix if translator.clever else None,
+        "rules": translator_digest(type(translator)),
+        "mapping": file_digest(UD2UM_FILE),
+        "signatures": len(table),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open_text(path, "w") as f:
+        print("#", json.dumps(header), file=f)
+        for key, um_tag in sorted(table.items()):  # type: ignore
+            print(*key, um_tag, sep="\t", file=f)
+
+
+def read_table(path: Path) -> Tuple[Dict, Table]:
+    """The header and the signatures of a table written by `write_table`."""
+    with open_text(path) as f:
+        first = f.readline()
+        if not first.startswith("# "):
+            raise ValueError(f"{path} is not a translation table")
+        header = json.loads(first[2:])
+        if header.get("version") != TABLE_VERSION:
+            raise ValueError(f"{path} is a table of another version")
+        table: Table = {}
+        for line in f:
+            *key, um_tag = line.rstrip("\n").split("\t")
+            table[tuple(key)] = UmTag(um_tag)
+    return header, table
+
+
+def export_table(
+    language: LanguageCoding,
+    clever: bool,
+    files: Iterable[Path],
+    output: Path,
+) -> int:
+    """Compile the signatures of `files` into a table at `output`; return its size."""
+    # Uncached: every distinct signature is translated exactly once anyway.
+    translator = get_translator(language, clever, cache_size=0)
+    table = collect_signatures(translator, files)
+    write_table(output, language, translator, table)
+    return len(table)
+
+
+class LookupTranslator(Translator):
+    """Translate from a compiled table, with the full rules as a fallback.
+
+    The fallback keeps its own cache, so unseen signatures cost a rule
+    application only once.
+    """
+
+    def __init__(
+        self, table_file: Path, replace_feats=False, cache_size: int = 2 ** 16
+    ) -> None:
+        header, self.table = read_table(table_file)
+        language = get_lang(header["language"])
+        self.fallback = get_translator(
+            language, header["clever"], replace_feats, cache_size
+        )
+        if header["rules"] != translator_digest(translator_class(language)):
+            raise ValueError(f"{table_file} was compiled from other rules")
+        if header.get("mapping") != file_digest(UD2UM_FILE):
+            raise ValueError(f"{table_file} was compiled from another mapping")
+        super(LookupTranslator, self).__init__(
+            self.fallback.clever, replace_feats, cache_size=0
+        )
+        self.language = language
+        self.form_suffix = self.fallback.form_suffix
+        self.cache = self.fallback.cache
+
+    def translate_tag(self, record: CoNLLRow) -> UmTag:
+        um_tag = self.table.get(self.cache_key(record))
+        if um_tag is None:
+            um_tag = self.fallback.translate_tag(record)
+        return um_tag
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
+        self.fallback.lgspec_assert(cols, tags)
+
+    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
+        return self.fallback.lgspec_modify(cols, um)
+
+
+def load_translator(
+    language: LanguageCoding,
+    clever: bool,
+    replace_feats=False,
+    cache_size: int = 2 ** 16,
+    tables: Optional[Path] = None,
+) -> Translator:
+    """The language's `LookupTranslator` if `tables` has its table, else its rules."""
+    if tables is not None:
+        for compression in (None, *COMPRESSIONS):
+            path = table_path(tables, language, clever, compression)
+            if path.is_file():
+                return LookupTranslator(path, replace_feats, cache_size)
+    return get_translator(language, clever, replace_feats, cache_size)
@@ -1,9 +1,22 @@
 import re
-from collections import defaultdict
-from typing import List, Set
-
-from .languages import languages
-from .utils import CoNLLRow, UdFeat, UdTag, UmFeat, UmTag, ud2um_mapping
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from .converter import CompiledConverter
+from .languages import LanguageCoding, languages
+from .rules import GENDERS, Rule, RuleSet
+from .utils import CoNLLRow, UdFeat, UdTag, UmFeat, UmTag, load_ud2um_mapping
 
 EMPTY_FEAT = UmFeat("_")
 
@@ -97,7 +110,7 @@ def handle_possession(ud_tag: UdTag) -> UmFeat:
 
 def process_tag(part: UdFeat) -> UmFeat:
     try:
-        um_part = ud2um_mapping[part]
+        um_part = load_ud2um_mapping()[part]
     except KeyError:
         # print("Couldn't find", part)
         return EMPTY_FEAT
@@ -137,18 +150,78 @@ def ud2um(ud_tag: UdTag) -> UmTag:
     return UmTag(";".join(um_tag))
 
 
+# `ud2um` is kept as the readable reference; translators use the compiled one.
+@lru_cache(maxsize=None)
+def compiled_converter() -> CompiledConverter:
+    return CompiledConverter(load_ud2um_mapping())
+
+
+class TranslationCache:
+    """Bounded LRU mapping from tag signatures to translated UniMorph tags."""
+
+    def __init__(self, maxsize: int = 2 ** 16) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: Dict[Hashable, UmTag] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[UmTag]:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)  # type: ignore
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: UmTag) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)  # type: ignore
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class Translator:
-    def __init__(self, clever, replace_feats) -> None:
+    # Language-specific rewrites, applied in order by `lgspec_modify`.
+    rules: Sequence[Rule] = ()
+    _rules: Optional[RuleSet] = None
+    # How many trailing characters of the word form `lgspec_modify` looks at.
+    # `None` means the translation depends on the tag alone, so the form is
+    # left out of the cache key. Derived from `rules` unless set explicitly.
+    form_suffix: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._rules = RuleSet(cls.rules) if cls.rules else None
+        if "form_suffix" not in vars(cls) and cls._rules is not None:
+            cls.form_suffix = cls._rules.suffix_length
+
+    def __init__(self, clever, replace_feats, cache_size: int = 2 ** 16) -> None:
         self.clever = clever
         self.replace_feats = replace_feats
+        self.cache = TranslationCache(cache_size)
 
     def translate(self, record: CoNLLRow) -> CoNLLRow:
-        ud_tag: UdTag = UdTag(f"{record.upostag}|{record.feats}")
-        # print(ud_tag)
-        um_tag: UmTag = self.basic_convert(ud_tag)
-
-        if self.clever:
-            um_tag = self.lgspec_modify(record, um_tag)
+        um_tag = self.translate_tag(record)
 
         if self.replace_feats:
             updated = record._replace(feats=um_tag)
@@ -156,197 +229,148 @@ class Translator:
             updated = record._replace(misc=um_tag)
         return updated
 
-    def basic_convert(self, ud_tag: UdTag) -> UmTag:
-        return ud2um(ud_tag)
-
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    def cache_key(self, record: CoNLLRow) -> Tuple[str, ...]:
+        if self.clever and self.form_suffix is not None:
+            return (record.upostag, record.feats, record.form[-self.form_suffix :])
+        return (record.upostag, record.feats)
+
+    def translate_tag(self, record: CoNLLRow) -> UmTag:
+        key = self.cache_key(record)
+        um_tag = self.cache.get(key)
+        if um_tag is None:
+            um_tag = self.basic_convert(f"{record.upostag}|{record.feats}")
+            if self.clever:
+                um_tag = self.lgspec_modify(record, um_tag)
+            self.cache.put(key, um_tag)
+        return um_tag
+
+    def basic_convert(self, ud_tag: str) -> UmTag:
+        return compiled_converter()(ud_tag)
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         """Override me."""
         pass
 
     def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        return um
+        if self._rules is None:
+            return um
+        return UmTag(self._rules.apply(cols.form, um))
 
 
 class BasqueTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "V" in tags or "V.PTCP" in tags or "V.CVB" in tags or "V.MSDR" in tags
 
 
 class BulgarianTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(has="V", discard="FIN;ACT;IPFV;PFV"),
+        Rule(has="V.PTCP", discard="ADJ;V"),
+        Rule(has="V.PTCP;PRS", discard="IPFV"),
+        Rule(has="V.PTCP", lacks="PASS", add="ACT"),
+        Rule(has="V.PTCP;PFV", discard="PFV", add="PST"),
+        Rule(has="RL", discard="RL", add="SPRL"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "N" not in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "V" in tags:
-            tags.discard("FIN")
-            tags.discard("ACT")
-            tags.discard("IPFV")
-            tags.discard("PFV")
-        if "V.PTCP" in tags:
-            tags.discard("ADJ")
-            tags.discard("V")
-            if "PRS" in tags:
-                tags.discard("IPFV")
-            if "PASS" not in tags:
-                tags.add("ACT")
-            if "PFV" in tags:
-                tags.discard("PFV")
-                tags.add("PST")
-        if "RL" in tags:
-            tags.remove("RL")
-            tags.add("SPRL")
-        return UmTag(";".join(tags))
-
 
 class CatalanTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        # Rule(has="N", discard=GENDERS),
+        Rule(has="V.PTCP", discard="V"),
+        Rule(has="V", discard="FIN"),
+        Rule(has="V;PST", add="PFV"),
+        Rule(has="V;IPFV", add="PST"),
+        Rule(has="V;COND", discard="PRS"),
+        Rule(has="V;IMP", discard="PRS", add="POS"),
+        Rule(equals="MASC;PST;SG;V;V.PTCP", become="PST;V.PTCP"),
+        Rule(equals="V;V.MSDR", become="PRS;V.PTCP"),
+        Rule(exceeds="IPFV;SBJV", discard="IPFV"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "V" in tags or "V.PTCP" in tags or "V.CVB" in tags or "V.MSDR" in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        # if "N" in tags:
-        #     for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-        #         tags.discard(gender)
-        if "V.PTCP" in tags:
-            tags.discard("V")
-        if "V" in tags:
-            tags.discard("FIN")
-            if "PST" in tags:
-                tags.add("PFV")
-            if "IPFV" in tags:
-                tags.add("PST")
-            if "COND" in tags:
-                tags.discard("PRS")
-            if "IMP" in tags:
-                tags.add("POS")
-                tags.discard("PRS")
-        if tags == set("MASC;PST;SG;V;V.PTCP".split(";")):
-            tags = {"PST", "V.PTCP"}
-        if tags == set("V;V.MSDR".split(";")):
-            tags = set("PRS;V.PTCP".split(";"))
-        if {"IPFV", "SBJV"} < tags:
-            tags.remove("IPFV")
-        return UmTag(";".join(tags))
-
 
 class CzechTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "ADJ" in tags:
-            tags.discard("POS")
-        if "N" in tags:
-            tags.discard("POS")
-            tags.discard("INAN")
-            tags.discard("ANIM")
-            for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-                if gender in tags:
-                    tags.remove(gender)
-        if "V" in tags:
-            tags.discard("ACT")
-            tags.discard("FIN")
-            tags.discard("POS")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(has="ADJ", discard="POS"),
+        Rule(has="N", discard=f"POS;INAN;ANIM;{GENDERS}"),
+        Rule(has="V", discard="ACT;FIN;POS"),
+    ]
 
 
 class DanishTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
-        assert "ADJ" not in tags
+    rules = [
+        Rule(has="V", discard="FIN"),
+    ]
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "V" in tags:
-            tags.discard("FIN")
-        return UmTag(";".join(tags))
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
+        assert "ADJ" not in tags
 
 
 class DutchTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "N" not in tags
 
 
 class EnglishTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard="FIN;IND"),
+        Rule(equals="V;PRS", become="V;NFIN"),
+        Rule(equals="V;V.MSDR", become="PRS;V;V.PTCP"),
+        Rule(has="V", discard="PASS"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "V" in tags or "V.PTCP" in tags or "V.CVB" in tags or "V.MSDR" in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        tags.discard("FIN")
-        tags.discard("IND")
-        if tags == {"V", "PRS"}:
-            tags = {"V", "NFIN"}
-        if tags == {"V", "V.MSDR"}:
-            tags = {"PRS", "V", "V.PTCP"}
-        if "V" in tags:
-            tags.discard("PASS")
-        return UmTag(";".join(tags))
-
 
 class EstonianTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "ADJ" not in tags
 
 
 class FinnishTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(has="V;FIN", discard="FIN", add="POS"),
+        Rule(equals="NOM;PASS;SG;V;V.PTCP", become="PASS;PST;V.PTCP"),
+        Rule(equals="ACT;NOM;SG;V;V.PTCP", discard="NOM;SG;V", add="PST"),
+        Rule(equals="ACT;NFIN;SG;V", discard="ACT;SG"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert tags != set("ADJ;GEN;SG".split(";"))
         assert tags != set("ADJ;GEN;PL".split(";"))
         assert "0" not in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "V" in tags:
-            if "FIN" in tags:
-                tags.remove("FIN")
-                tags.add("POS")
-        if tags == set("NOM;PASS;SG;V;V.PTCP".split(";")):
-            tags = set("PASS;PST;V.PTCP".split(";"))
-        if tags == set("ACT;NOM;SG;V;V.PTCP".split(";")):
-            tags.remove("NOM")
-            tags.remove("SG")
-            tags.remove("V")
-            tags.add("PST")
-        if tags == set("ACT;NFIN;SG;V".split(";")):
-            tags.remove("ACT")
-            tags.remove("SG")
-        return UmTag(";".join(tags))
-
 
 class FrenchTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        # Rule(has="N", discard=GENDERS),
+        Rule(has="V.PTCP", discard="V;MASC;FEM;SG;PL"),
+        Rule(has="V", discard="FIN"),
+        Rule(has="V;PST", add="PFV"),
+        Rule(has="V;IPFV", add="PST"),
+        Rule(has="V;COND", discard="PRS"),
+        Rule(has="V;IMP", discard="PRS", add="POS"),
+        Rule(equals="MASC;PST;SG;V;V.PTCP", become="PST;V.PTCP"),
+        Rule(equals="V;V.MSDR", become="PRS;V.CVB"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "V" in tags or "V.PTCP" in tags or "V.CVB" in tags or "V.MSDR" in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        # if "N" in tags:
-        #     for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-        #         tags.discard(gender)
-        if "V.PTCP" in tags:
-            tags.discard("V")
-            tags.discard("MASC")
-            tags.discard("FEM")
-            tags.discard("SG")
-            tags.discard("PL")
-        if "V" in tags:
-            tags.discard("FIN")
-            if "PST" in tags:
-                tags.add("PFV")
-            if "IPFV" in tags:
-                tags.add("PST")
-            if "COND" in tags:
-                tags.discard("PRS")
-            if "IMP" in tags:
-                tags.add("POS")
-                tags.discard("PRS")
-        if tags == set("MASC;PST;SG;V;V.PTCP".split(";")):
-            tags = {"PST", "V.PTCP"}
-        if tags == set("V;V.MSDR".split(";")):
-            tags = set("PRS;V.CVB".split(";"))
-        return UmTag(";".join(tags))
-
 
 class GermanTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard=f"{GENDERS};FIN"),
+        Rule(equals="V;V.PTCP", become="PST;V.PTCP"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert (
             "V" in tags
             or "N" in tags
@@ -357,353 +381,232 @@ class GermanTranslator(Translator):
         # assert tags != {"N"}
         # assert tags != {"V"}
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-            if gender in tags:
-                tags.remove(gender)
-        tags.discard("FIN")
-        if tags == {"V", "V.PTCP"}:
-            tags = {"PST", "V.PTCP"}
-        return UmTag(";".join(tags))
-
 
 # translators[get_lang("German")] = GermanTranslator
 
 
 class HebrewTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard="MASC;FEM;NEUT;{FEM/MASC}"),
+        Rule(has="V.PTCP", discard="V"),
+        Rule(has="V", discard="ACT;POS"),
+        Rule(equals="N;SG", add="NDEF"),
+        Rule(equals="N;PL", add="NDEF"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "ADJ" not in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        for gender in {"MASC", "FEM", "NEUT", "{FEM/MASC}"}:
-            if gender in tags:
-                tags.remove(gender)
-        if "V.PTCP" in tags:
-            tags.discard("V")
-        if "V" in tags:
-            tags.discard("ACT")
-            tags.discard("POS")
-        if "N" in tags:
-            if len(tags) == 2:
-                if "SG" in tags or "PL" in tags:
-                    tags.add("NDEF")
-
-        return UmTag(";".join(tags))
-
 
 class HungarianTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard="FIN;ACT"),
+        Rule(has="NFIN", discard="PRS"),
+        # Rule(has="IN+ABL", discard="IN+ABL", add="ON+ABL"),
+        # Rule(has="IN+ESS", discard="IN+ESS", add="ON+ESS"),
+        # Rule(has="IN+ALL", discard="IN+ALL", add="ON+ALL"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "ADJ" not in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        tags.discard("FIN")
-        tags.discard("ACT")
-        if "NFIN" in tags:
-            tags.discard("PRS")
-        # if "IN+ABL" in tags:
-        #     tags.discard("IN+ABL")
-        #     tags.add("ON+ABL")
-        # if "IN+ESS" in tags:
-        #     tags.discard("IN+ESS")
-        #     tags.add("ON+ESS")
-        # if "IN+ALL" in tags:
-        #     tags.discard("IN+ALL")
-        #     tags.add("ON+ALL")
-        return UmTag(";".join(tags))
-
 
 class ItalianTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        # if "N" in tags:
-        #     for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-        #         tags.discard(gender)
-        if "V.PTCP" in tags:
-            tags.discard("V")
-            tags.discard("MASC")
-            tags.discard("FEM")
-            tags.discard("SG")
-            tags.discard("PL")
-        if "V" in tags:
-            tags.discard("FIN")
-            if "PST" in tags:
-                tags.add("PFV")
-            if "IPFV" in tags:
-                tags.add("PST")
-            if "COND" in tags:
-                tags.discard("PRS")
-        if tags == set("MASC;PST;SG;V;V.PTCP".split(";")):
-            tags = {"PST", "V.PTCP"}
-        if tags == set("V;V.MSDR".split(";")):
-            tags = set("PRS;V.CVB".split(";"))
-        return UmTag(";".join(tags))
+    rules = [
+        # Rule(has="N", discard=GENDERS),
+        Rule(has="V.PTCP", discard="V;MASC;FEM;SG;PL"),
+        Rule(has="V", discard="FIN"),
+        Rule(has="V;PST", add="PFV"),
+        Rule(has="V;IPFV", add="PST"),
+        Rule(has="V;COND", discard="PRS"),
+        Rule(equals="MASC;PST;SG;V;V.PTCP", become="PST;V.PTCP"),
+        Rule(equals="V;V.MSDR", become="PRS;V.CVB"),
+    ]
 
 
 class LatinTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "N" in tags:
-            for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-                tags.discard(gender)
-        if "V" in tags:
-            tags.discard("ACT")
-            tags.discard("FIN")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(has="N", discard=GENDERS),
+        Rule(has="V", discard="ACT;FIN"),
+    ]
 
 
 class LatvianTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(has="V", discard="FH;POS;NEG;ACT;FIN;REFL"),
+        Rule(has="N", discard=GENDERS),
+        Rule(equals="COND;V", add="PRS"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert tags != set("3;IND;PRS;V".split(";"))
         assert tags != set("3;IND;PST;V".split(";"))
         assert tags != set("3;IND;FUT;V".split(";"))
         assert "ESS" not in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "V" in tags:
-            tags.discard("FH")
-            tags.discard("POS")
-            tags.discard("NEG")
-            tags.discard("ACT")
-            tags.discard("FIN")
-            tags.discard("REFL")
-        if "N" in tags:
-            for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-                tags.discard(gender)
-        if tags == set("COND;V".split(";")):
-            tags.add("PRS")
-        return UmTag(";".join(tags))
-
 
 class Norwegian_BokmaalTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        tags.discard("IND")
-        tags.discard("FIN")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(discard="IND;FIN"),
+    ]
 
 
 class Norwegian_NynorskTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        tags.discard("IND")
-        tags.discard("FIN")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(discard="IND;FIN"),
+    ]
 
 
 class PolishTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "N" in tags:
-            for gender in {"MASC", "FEM", "NEUT"}:
-                tags.discard(gender)
-            tags.discard("INAN")
-            tags.discard("HUM")
-            tags.discard("NHUM")
-        if "ADJ" in tags:
-            if "PL" in tags:
-                for gender in {"MASC", "FEM", "NEUT"}:
-                    tags.discard(gender)
-            tags.discard("HUM")
-            tags.discard("INAN")
-        if set("IPFV;NFIN;V".split(";")) == tags:
-            tags.remove("IPFV")
-        if set("PFV;NFIN;V".split(";")) == tags:
-            tags.remove("PFV")
-        if "V" in tags:
-            tags.discard("ACT")
-            tags.discard("FIN")
-            tags.discard("IND")
-            tags.discard("IPFV")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(has="N", discard="MASC;FEM;NEUT;INAN;HUM;NHUM"),
+        Rule(has="ADJ;PL", discard="MASC;FEM;NEUT"),
+        Rule(has="ADJ", discard="HUM;INAN"),
+        Rule(equals="IPFV;NFIN;V", discard="IPFV"),
+        Rule(equals="PFV;NFIN;V", discard="PFV"),
+        Rule(has="V", discard="ACT;FIN;IND;IPFV"),
+    ]
 
 
 class PortugueseTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(has="V.PTCP", discard="V"),
+        Rule(has="V.PTCP;PASS", discard="PASS", add="PST"),
+        Rule(has="V.PTCP", lacks="PRS", add="PST"),
+        Rule(equals="PST;V.PTCP", suffix=("do", "to"), add="MASC;SG"),
+        Rule(equals="V;V.MSDR", become="V.PTCP;PRS"),
+        Rule(has="V", discard="FIN"),
+        Rule(has="V;PST", lacks="IPFV", add="PFV"),
+        Rule(has="V;IPFV", add="PST"),
+        Rule(equals="3;IND;PL;V", suffix=("ram",), add="PFV;PST"),
+        Rule(has="V", discard="PASS"),
+        Rule(has="V;PST+PRF", discard="PST+PRF", add="PST;PRF"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "V" in tags or "V.PTCP" in tags or "V.CVB" in tags or "V.MSDR" in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "V.PTCP" in tags:
-            tags.discard("V")
-            if "PASS" in tags:
-                tags.remove("PASS")
-                tags.add("PST")
-            if "PRS" not in tags:
-                tags.add("PST")
-            if (cols.form.endswith("do") or cols.form.endswith("to")) and tags == set(
-                "PST;V.PTCP".split(";")
-            ):
-                tags.add("MASC")
-                tags.add("SG")
-        if tags == {"V", "V.MSDR"}:
-            tags = {"V.PTCP", "PRS"}
-        if "V" in tags:
-            tags.discard("FIN")
-            if "PST" in tags and "IPFV" not in tags:
-                tags.add("PFV")
-            if "IPFV" in tags:
-                tags.add("PST")
-            if cols.form.endswith("ram") and tags == set("3;IND;PL;V".split(";")):
-                tags.add("PFV")
-                tags.add("PST")
-            tags.discard("PASS")
-            if "PST+PRF" in tags:
-                tags.add("PST")
-                tags.add("PRF")
-                tags.remove("PST+PRF")
-        return UmTag(";".join(tags))
-
 
 class RomanianTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "V" in tags:
-            tags.discard("FIN")
-        if "{ACC/NOM}" in tags:
-            tags.remove("{ACC/NOM}")
-            tags.add("NOM/ACC")
-        if "N" in tags:
-            for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-                tags.discard(gender)
-        if {"V", "PST", "IND"} < tags:
-            tags.add("PFV")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(has="V", discard="FIN"),
+        Rule(has="{ACC/NOM}", discard="{ACC/NOM}", add="NOM/ACC"),
+        Rule(has="N", discard=GENDERS),
+        Rule(exceeds="V;PST;IND", add="PFV"),
+    ]
 
 
 class SlovenianTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "N" in tags:
-            for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-                tags.discard(gender)
-            tags.discard("ANIM")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(has="N", discard=f"{GENDERS};ANIM"),
+    ]
 
 
 class SpanishTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard="FIN"),
+        Rule(has="AUX", discard="AUX", add="V"),
+        Rule(exceeds="V;V.PTCP", discard="V"),
+        Rule(equals="V;V.MSDR", become="PRS;V.CVB"),
+        Rule(has="PST", lacks="V.PTCP", add="PFV"),
+        Rule(exceeds="IND;IPFV", add="PST"),
+        Rule(has="IMP", add="POS"),
+        # Checked first, while the bundle still has IPFV.
+        Rule(exceeds="IPFV;SBJV", suffix=("ra", "ran"), add="LGSPEC1"),
+        Rule(exceeds="IPFV;SBJV", discard="IPFV", add="PST"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         assert "V" in tags or "V.PTCP" in tags or "V.CVB" in tags or "V.MSDR" in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        tags.discard("FIN")
-        if "AUX" in tags:
-            tags.remove("AUX")
-            tags.add("V")
-        if {"V", "V.PTCP"} < tags:
-            tags.remove("V")
-        if {"V", "V.MSDR"} == tags:
-            tags = {"PRS", "V.CVB"}
-        if "PST" in tags and "V.PTCP" not in tags:
-            tags.add("PFV")
-        if {"IND", "IPFV"} < tags:
-            tags.add("PST")
-        if "IMP" in tags:
-            tags.add("POS")
-        if {"IPFV", "SBJV"} < tags:
-            tags.remove("IPFV")
-            tags.add("PST")
-            if cols.form[-2:] == "ra" or cols.form[-3:] == "ran":
-                tags.add("LGSPEC1")
-        return UmTag(";".join(tags))
-
 
 # translators[get_lang("Spanish")] = SpanishTranslator
 
 
 class SwedishTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard="FIN"),
+        Rule(has="ADJ", discard="NOM"),
+        Rule(has="ADJ;V.PTCP", discard="V.PTCP;PST;PRS"),
+        Rule(equals="ADJ;PL", add="INDF"),
+        Rule(has="N", discard="MASC+FEM;NEUT"),
+        Rule(equals="ACT;SUP;V", discard="SUP;V", add="V.CVB"),
+        Rule(equals="PASS;SUP;V", discard="SUP;V", add="V.CVB"),
+        Rule(equals="ADJ;DEF;SG", become="ADJ;DEF"),
+        Rule(equals="IND;PRS;V", add="ACT"),
+        Rule(equals="ACT;IMP;V", discard="ACT"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         # assert "CMPR" not in tags
         pass
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        tags.discard("FIN")
-        if "ADJ" in tags:
-            tags.discard("NOM")
-            if "V.PTCP" in tags:
-                tags.remove("V.PTCP")
-                tags.discard("PST")
-                tags.discard("PRS")
-        if tags == {"ADJ", "PL"}:
-            tags.add("INDF")
-        if "N" in tags:
-            tags.discard("MASC+FEM")
-            tags.discard("NEUT")
-        if tags == {"ACT", "SUP", "V"} or tags == {"PASS", "SUP", "V"}:
-            tags.remove("SUP")
-            tags.remove("V")
-            tags.add("V.CVB")
-        if tags == {"ADJ", "DEF", "SG"}:
-            tags = {"ADJ", "DEF"}
-        if {"IND", "PRS", "V"} == tags:
-            tags.add("ACT")
-        if {"ACT", "IMP", "V"} == tags:
-            tags.remove("ACT")
-        return UmTag(";".join(tags))
-
 
 class TurkishTranslator(Translator):
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "N" in tags:
-            tags.discard("3")
-        return UmTag(";".join(tags))
+    rules = [
+        Rule(has="N", discard="3"),
+    ]
 
     # def lgspec_assert(self, cols, tags):
     #     assert "ESS" not in tags
 
 
 class UkrainianTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(has="N", discard=f"{GENDERS};INAN;ANIM"),
+        Rule(has="NFIN;V", discard="IPFV;PFV"),
+        Rule(has="V", discard="FIN;IND;PFV;IPFV"),
+        Rule(has="V.CVB", discard="V"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         # assert "DET" not in tags
         pass
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        if "N" in tags:
-            for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-                if gender in tags:
-                    tags.remove(gender)
-        if "N" in tags:
-            tags.discard("INAN")
-            tags.discard("ANIM")
-        if tags >= {"NFIN", "V"}:
-            tags.discard("IPFV")
-            tags.discard("PFV")
-        if "V" in tags:
-            for tag in "FIN;IND;PFV;IPFV".split(";"):
-                tags.discard(tag)
-        if "V.CVB" in tags:
-            tags.discard("V")
-        return UmTag(";".join(tags))
-
 
 class UrduTranslator(Translator):
-    def lgspec_assert(self, cols: CoNLLRow, tags: Set[str]) -> None:
+    rules = [
+        Rule(discard=GENDERS),
+        Rule(has="N;SG", discard="3"),
+        Rule(has="N;PL", discard="3"),
+        Rule(has="PROPN", discard="3"),
+    ]
+
+    def lgspec_assert(self, cols: CoNLLRow, tags: AbstractSet[str]) -> None:
         # assert "PART" not in tags
         assert "ADJ" not in tags
 
-    def lgspec_modify(self, cols: CoNLLRow, um: UmTag) -> UmTag:
-        tags = set(um.split(";"))
-        for gender in {"MASC", "FEM", "NEUT", "{MASC/NEUT}"}:
-            if gender in tags:
-                tags.remove(gender)
-        if {"N", "SG"} <= tags or {"N", "PL"} <= tags or "PROPN" in tags:
-            tags.discard("3")
-        return UmTag(";".join(tags))
-
-
-translators = dict()
-for language in languages:
-    name = language.name
-    try:
-        translators[language] = getattr(
-            __import__(__name__), "".join(name.replace("-", "_")) + "Translator"
-        )
-    except (NameError, AttributeError):
-        pass
+
+@lru_cache(maxsize=None)
+def _registry() -> Dict[LanguageCoding, Type[Translator]]:
+    # Classes are found by name in this module, e.g. "Norwegian-Bokmaal" is
+    # served by `Norwegian_BokmaalTranslator`.
+    namespace = globals()
+    registry = {}
+    for language in languages:
+        name = language.name.replace("-", "_") + "Translator"
+        if name in namespace:
+            registry[language] = namespace[name]
+    return registry
+
+
+def translator_class(language: LanguageCoding) -> Type[Translator]:
+    return _registry().get(language, Translator)
+
+
+def get_translator(
+    language: LanguageCoding,
+    clever: bool,
+    replace_feats: bool = False,
+    cache_size: int = 2 ** 16,
+) -> Translator:
+    return translator_class(language)(clever, replace_feats, cache_size)
+
+
+def __getattr__(name: str) -> Any:
+    # The registry and converter are built on first use, not at import time.
+    if name == "translators":
+        return _registry()
+    if name == "compiled_ud2um":
+        return compiled_converter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
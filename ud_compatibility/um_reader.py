@@ -1,13 +1,35 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import shutil
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Iterable, Tuple, Set, Dict
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 
+from .streams import open_text, stored_file
 from .utils import Form, Lemma, UmFeat, UmFeats, UniMorphTriple
 
 
 def _read_unimorph(fname: Path) -> Iterable[UniMorphTriple]:
-    with open(fname, encoding="utf-8") as f:
+    with open_text(fname) as f:
         for line in f:
             if line.split():
                 try:
@@ -30,5 +52,678 @@ def _as_dict_of_sets(
     return dict(tags), dict(lemmas)
 
 
-def unimorph(fname: Path) -> Tuple[Dict[Form, Set[UmFeats]], Dict[Form, Set[Lemma]]]:
-    return _as_dict_of_sets(_read_unimorph(fname))
+UNKNOWN_MASK = -1
+
+
+class FeatureVocabulary:
+    """A bit for each UniMorph feature used in a lexicon.
+
+    A bundle is encoded as the OR of its features' bits, so two bundles are
+    equal exactly when their masks are. A tag with a feature the lexicon never
+    uses can equal none of its bundles, and is encoded as `UNKNOWN_MASK`.
+    """
+
+    def __init__(self, bundles: Iterable[UmFeats]) -> None:
+        self.bits: Dict[str, int] = {}
+        self.masks: List[int] = []
+        for bundle in bundles:
+            mask = 0
+            for feat in sorted(bundle):
+                mask |= self.bits.setdefault(feat, 1 << len(self.bits))
+            self.masks.append(mask)
+        self._bundle_ids = {mask: i for i, mask in enumerate(self.masks)}
+        self._tags: Dict[str, int] = {}
+
+    def encode(self, feats: Iterable[str]) -> int:
+        bits = self.bits
+        mask = 0
+        for feat in feats:
+            bit = bits.get(feat)
+            if bit is None:
+                return UNKNOWN_MASK
+            mask |= bit
+        return mask
+
+    def bundle_id(self, tag: str) -> int:
+        """The ID of the lexicon bundle equal to the ";"-joined `tag`, or -1.
+
+        Translated tags repeat a lot, so the answer is kept per tag string.
+        """
+        try:
+            return self._tags[tag]
+        except KeyError:
+            mask = self.encode(tag.split(";"))
+            bundle = self._tags[tag] = self._bundle_ids.get(mask, -1)
+            return bundle
+
+
+class Lexicon:
+    """A UniMorph lexicon with interned feature bundles and lemmas.
+
+    Every distinct bundle and lemma is stored once and referred to by an
+    integer ID. Each form owns a slice of two parallel arrays of
+    (bundle ID, lemma ID) entries, sorted by lemma ID and then bundle ID and
+    without duplicates, so the entries of a (form, lemma) pair are adjacent.
+    """
+
+    def __init__(
+        self,
+        forms: Dict[Form, int],
+        offsets: "array[int]",
+        entry_bundles: "array[int]",
+        entry_lemmas: "array[int]",
+        bundles: List[UmFeats],
+        lemmas: List[Lemma],
+    ) -> None:
+        self.forms = forms
+        self.offsets = offsets
+        self.entry_bundles = entry_bundles
+        self.entry_lemmas = entry_lemmas
+        self.bundles = bundles
+        self.lemma_names = lemmas
+        self.tags = _BundleView(self)
+        self.lemmas = _LemmaView(self)
+        self._vocabulary: Optional[FeatureVocabulary] = None
+        self._joint: Optional[_PairIndex] = None
+
+    @property
+    def vocabulary(self) -> FeatureVocabulary:
+        if self._vocabulary is None:
+            self._vocabulary = FeatureVocabulary(self.bundles)
+        return self._vocabulary
+
+    @property
+    def joint(self) -> "_PairIndex":
+        """(form, lemma) → the IDs of the bundles attested for that pair.
+
+        Built on first use, so that only lemma-aware scoring pays for it.
+        """
+        if self._joint is None:
+            self._joint = _PairIndex(self)
+        return self._joint
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[UniMorphTriple]) -> "Lexicon":
+        forms: Dict[Form, int] = {}
+        bundle_ids: Dict[UmFeats, int] = {}
+        lemma_ids: Dict[Lemma, int] = {}
+        row_forms, row_bundles, row_lemmas = array("I"), array("I"), array("I")
+        for form, lemma, tag in rows:
+            row_forms.append(forms.setdefault(form, len(forms)))
+            row_bundles.append(bundle_ids.setdefault(frozenset(tag), len(bundle_ids)))
+            row_lemmas.append(lemma_ids.setdefault(lemma, len(lemma_ids)))
+
+        # Counting sort of the rows by form.
+        offsets = array("Q", bytes(8 * (len(forms) + 1)))
+        for f in row_forms:
+            offsets[f + 1] += 1
+        for f in range(len(forms)):
+            offsets[f + 1] += offsets[f]
+        cursor = offsets[:-1]
+        order = array("Q", bytes(8 * len(row_forms)))
+        for row, f in enumerate(row_forms):
+            order[cursor[f]] = row
+            cursor[f] += 1
+        del cursor, row_forms
+
+        # Deduplicate each form's entries, shrinking the offsets as we go.
+        entry_bundles, entry_lemmas = array("I"), array("I")
+        start = 0
+        for f in range(len(forms)):
+            end = offsets[f + 1]
+            entries = {(row_lemmas[r], row_bundles[r]) for r in order[start:end]}
+            for lemma_id, bundle_id in sorted(entries):
+                entry_bundles.append(bundle_id)
+                entry_lemmas.append(lemma_id)
+            start = end
+            offsets[f + 1] = len(entry_bundles)
+
+        return cls(
+            forms,
+            offsets,
+            entry_bundles,
+            entry_lemmas,
+            list(bundle_ids),
+            list(lemma_ids),
+        )
+
+    def bundle_ids(self, form: Form) -> "array[int]":
+        f = self.forms[form]
+        return self.entry_bundles[self.offsets[f] : self.offsets[f + 1]]
+
+    def lemma_ids(self, form: Form) -> "array[int]":
+        f = self.forms[form]
+        return self.entry_lemmas[self.offsets[f] : self.offsets[f + 1]]
+
+    def __contains__(self, form: object) -> bool:
+        return form in self.forms
+
+    def __iter__(self) -> Iterator[Form]:
+        return iter(self.forms)
+
+    def __len__(self) -> int:
+        return len(self.forms)
+
+
+class _FormView(Mapping):
+    # Works over a `Lexicon` or a `MappedLexicon`.
+    def __init__(self, lexicon: Any) -> None:
+        self.lexicon = lexicon
+
+    def __contains__(self, form: object) -> bool:
+        return form in self.lexicon
+
+    def __iter__(self) -> Iterator[Form]:
+        return iter(self.lexicon)
+
+    def __len__(self) -> int:
+        return len(self.lexicon)
+
+
+class _BundleView(_FormView):
+    """form → the (shared) feature bundles attested for it."""
+
+    def __getitem__(self, form: Form) -> FrozenSet[UmFeats]:
+        bundles = self.lexicon.bundles
+        return frozenset([bundles[i] for i in self.lexicon.bundle_ids(form)])
+
+
+class _LemmaView(_FormView):
+    """form → the lemmas it is attested with."""
+
+    def __getitem__(self, form: Form) -> FrozenSet[Lemma]:
+        lemmas = self.lexicon.lemma_names
+        return frozenset([lemmas[i] for i in self.lexicon.lemma_ids(form)])
+
+
+class _PairIndex(Mapping):
+    """(form, lemma) → bundle IDs, hashed on the interned IDs of a `Lexicon`.
+
+    Keyed by `form ID * lemma count + lemma ID`, each pair costs a dict slot
+    and two ints; the value packs the pair's run of entries, which are
+    adjacent, as `start << 32 | end`.
+    """
+
+    def __init__(self, lexicon: Lexicon) -> None:
+        self.lexicon = lexicon
+        self.forms = lexicon.forms
+        self.lemma_ids = {name: i for i, name in enumerate(lexicon.lemma_names)}
+        self.entry_bundles = lexicon.entry_bundles
+        self.n_lemmas = n_lemmas = len(lexicon.lemma_names)
+        self.spans: Dict[int, int] = {}
+        offsets, entry_lemmas = lexicon.offsets, lexicon.entry_lemmas
+        for f in range(len(lexicon.forms)):
+            start, end = offsets[f], offsets[f + 1]
+            while start < end:
+                lemma_id = entry_lemmas[start]
+                run = start + 1
+                while run < end and entry_lemmas[run] == lemma_id:
+                    run += 1
+                self.spans[f * n_lemmas + lemma_id] = start << 32 | run
+                start = run
+
+    def get(self, pair: Tuple[Form, Lemma], default=None):  # type: ignore
+        form, lemma = pair
+        f = self.forms.get(form)
+        lemma_id = self.lemma_ids.get(lemma)
+        if f is None or lemma_id is None:
+            return default
+        span = self.spans.get(f * self.n_lemmas + lemma_id)
+        if span is None:
+            return default
+        return self.entry_bundles[span >> 32 : span & 0xFFFFFFFF]
+
+    def __getitem__(self, pair: Tuple[Form, Lemma]) -> Sequence[int]:
+        bundle_ids = self.get(pair)
+        if bundle_ids is None:
+            raise KeyError(pair)
+        return bundle_ids
+
+    def __iter__(self) -> Iterator[Tuple[Form, Lemma]]:
+        lemmas = self.lexicon.lemmas
+        return ((form, lemma) for form in self.forms for lemma in lemmas[form])
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+class _JointView(Mapping):
+    """(form, lemma) → bundle IDs, looked up in a `MappedLexicon` on demand."""
+
+    def __init__(self, lexicon: "MappedLexicon") -> None:
+        self.lexicon = lexicon
+
+    def get(self, pair: Tuple[Form, Lemma], default=None):  # type: ignore
+        # Most probes miss, so they are answered without raising.
+        return self.lexicon.pair_bundle_ids(*pair) or default
+
+    def __getitem__(self, pair: Tuple[Form, Lemma]) -> Sequence[int]:
+        bundle_ids = self.lexicon.pair_bundle_ids(*pair)
+        if not bundle_ids:
+            raise KeyError(pair)
+        return bundle_ids
+
+    def __iter__(self) -> Iterator[Tuple[Form, Lemma]]:
+        lemmas = self.lexicon.lemmas
+        return ((form, lemma) for form in self.lexicon for lemma in lemmas[form])
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+LEXICON_CACHE_VERSION = 2
+
+
+def _sha256(fname: Path) -> str:
+    # An archive member is hashed as its whole archive.
+    digest = hashlib.sha256()
+    with open(stored_file(fname), "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_key(fname: Path) -> Dict[str, Any]:
+    stat = stored_file(fname).stat()
+    return {
+        "version": LEXICON_CACHE_VERSION,
+        "path": str(fname.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _source_record(fname: Path) -> Dict[str, Any]:
+    return dict(_cache_key(fname), sha256=_sha256(fname))
+
+
+def _is_fresh(fname: Path, record: Dict[str, Any]) -> bool:
+    """Whether `record`, from `_source_record`, still describes `fname`.
+
+    A matching size and mtime are trusted. Otherwise the content hash decides,
+    so a touched but unchanged file is still considered fresh.
+    """
+    key = _cache_key(fname)
+    changed = {k for k in key if record.get(k) != key[k]}
+    return not changed or (
+        changed == {"mtime_ns"} and record.get("sha256") == _sha256(fname)
+    )
+
+
+def _cache_file(fname: Path, cache_dir: Path) -> Path:
+    name = hashlib.sha1(str(fname.resolve()).encode("utf-8")).hexdigest()
+    return cache_dir / f"{name}.lexicon"
+
+
+def _read_cached_lexicon(fname: Path, cache_file: Path) -> Optional[Lexicon]:
+    """Return the cached lexicon for `fname`, or None if it is missing or stale."""
+    try:
+        with open(cache_file, "rb") as f:
+            header = pickle.load(f)
+            if not _is_fresh(fname, header):
+                return None
+            payload_start = f.tell()
+            forms, *arrays = pickle.load(f)
+    except (OSError, EOFError, KeyError, ValueError, pickle.UnpicklingError):
+        return None
+    key = _cache_key(fname)
+    if any(header.get(k) != key[k] for k in key):
+        # Only the hash vouched for it; restamp it so later runs need not hash.
+        try:
+            _restamp_cached_lexicon(cache_file, dict(header, **key), payload_start)
+        except OSError:
+            pass
+    return Lexicon(dict(zip(forms, range(len(forms)))), *arrays)
+
+
+def _restamp_cached_lexicon(
+    cache_file: Path, header: Dict[str, Any], payload_start: int
+) -> None:
+    """Replace the header of `cache_file`, keeping its payload as it is."""
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    with open(cache_file, "rb") as source, open(tmp, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        source.seek(payload_start)
+        shutil.copyfileobj(source, f)
+    os.replace(tmp, cache_file)
+
+
+def _write_cached_lexicon(fname: Path, cache_file: Path, lexicon: Lexicon) -> None:
+    header = _source_record(fname)
+    payload = (
+        list(lexicon.forms),
+        lexicon.offsets,
+        lexicon.entry_bundles,
+        lexicon.entry_lemmas,
+        lexicon.bundles,
+        lexicon.lemma_names,
+    )
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_file)
+
+
+def load_lexicon(fname: Path, cache_dir: Optional[Path] = None) -> Lexicon:
+    """Parse a UniMorph file, going through the on-disk cache if one is given."""
+    if cache_dir is None:
+        return Lexicon.from_rows(_read_unimorph(fname))
+    cache_file = _cache_file(fname, cache_dir)
+    lexicon = _read_cached_lexicon(fname, cache_file)
+    if lexicon is None:
+        lexicon = Lexicon.from_rows(_read_unimorph(fname))
+        try:
+            _write_cached_lexicon(fname, cache_file, lexicon)
+        except OSError:
+            pass  # A read-only cache only costs us the speedup.
+    return lexicon
+
+
+def unimorph(fname: Path) -> Tuple[Mapping, Mapping]:
+    lexicon = load_lexicon(fname)
+    return lexicon.tags, lexicon.lemmas
+
+
+# On-disk index layout: a fixed header, then 8-byte aligned sections. Forms
+# and lemmas are sorted so that lookups can binary-search the memory-mapped
+# file, and each form's entries are sorted by lemma, then bundle.
+INDEX_MAGIC = b"UMIDX002"
+_INDEX_HEADER = struct.Struct("=8sQ7Q11Q")
+_BYTE_ORDER_MARK = 0x0102030405060708
+_INDEX_SECTIONS = [
+    "form_offsets",
+    "entry_offsets",
+    "entry_bundles",
+    "entry_lemmas",
+    "bundle_offsets",
+    "lemma_offsets",
+    "forms",
+    "bundles",
+    "lemmas",
+    "bloom",
+    "source",
+]
+
+
+def _bloom_positions(key: bytes, bits: int, hashes: int) -> Iterator[int]:
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+def _string_table(strings: Iterable[str]) -> Tuple["array[int]", bytes]:
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def build_index(
+    lexicon: Lexicon,
+    index_file: Path,
+    source: Optional[Path] = None,
+    bloom_bits_per_form: int = 10,
+) -> None:
+    """Write `lexicon` as a memory-mappable index for `MappedLexicon`.
+
+    A Bloom filter of `bloom_bits_per_form` bits per form lets lookups reject
+    most unknown forms without a binary search; 0 leaves it out.
+    """
+    forms = sorted(lexicon.forms)  # Code point order is UTF-8 byte order.
+    form_offsets, form_blob = _string_table(forms)
+    # Lemmas are renumbered in sorted order, so that IDs sort as names do.
+    lemma_names = lexicon.lemma_names
+    lemma_order = sorted(range(len(lemma_names)), key=lemma_names.__getitem__)
+    renumbered = array("I", bytes(4 * len(lemma_order)))
+    for new_id, old_id in enumerate(lemma_order):
+        renumbered[old_id] = new_id
+    entry_offsets = array("Q", [0])
+    entry_bundles, entry_lemmas = array("I"), array("I")
+    for form in forms:
+        entries = zip(lexicon.lemma_ids(form), lexicon.bundle_ids(form))
+        for lemma_id, bundle_id in sorted((renumbered[l], b) for l, b in entries):
+            entry_bundles.append(bundle_id)
+            entry_lemmas.append(lemma_id)
+        entry_offsets.append(len(entry_bundles))
+    bundle_offsets, bundle_blob = _string_table(
+        ";".join(sorted(bundle)) for bundle in lexicon.bundles
+    )
+    lemma_offsets, lemma_blob = _string_table(lemma_names[i] for i in lemma_order)
+
+    bloom_bits = -(-bloom_bits_per_form * len(forms) // 64) * 64
+    bloom_hashes = max(1, round(bloom_bits_per_form * 0.693))
+    bloom = bytearray(bloom_bits // 8)
+    if bloom_bits:
+        for form in forms:
+            for pos in _bloom_positions(form.encode("utf-8"), bloom_bits, bloom_hashes):
+                bloom[pos >> 3] |= 1 << (pos & 7)
+
+    record = _source_record(source) if source is not None else {}
+    sections = [
+        form_offsets.tobytes(),
+        entry_offsets.tobytes(),
+        entry_bundles.tobytes(),
+        entry_lemmas.tobytes(),
+        bundle_offsets.tobytes(),
+        lemma_offsets.tobytes(),
+        form_blob,
+        bundle_blob,
+        lemma_blob,
+        bytes(bloom),
+        json.dumps(record).encode("utf-8"),
+    ]
+    starts = []
+    position = _INDEX_HEADER.size
+    for section in sections:
+        starts.append(position)
+        position += -(-len(section) // 8) * 8
+    counts = [len(forms), len(entry_bundles), len(lexicon.bundles)]
+    counts += [len(lexicon.lemma_names), bloom_bits, bloom_hashes]
+
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_file.with_name(f"{index_file.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_INDEX_HEADER.pack(INDEX_MAGIC, _BYTE_ORDER_MARK, *counts, 0, *starts))
+        for start, section in zip(starts, sections):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(section)
+        f.write(b"\0" * (position - f.tell()))
+    os.replace(tmp, index_file)
+
+
+class _MappedStrings:
+    def __init__(self, mm: mmap.mmap, base: int, offsets: memoryview) -> None:
+        self.mm = mm
+        self.base = base
+        self.offsets = offsets
+
+    def __getitem__(self, i: int) -> str:
+        start = self.base + self.offsets[i]
+        return self.mm[start : self.base + self.offsets[i + 1]].decode("utf-8")
+
+    def search(self, key: bytes) -> int:
+        """The position of the UTF-8 `key` among the sorted strings, or -1."""
+        mm, base, offsets = self.mm, self.base, self.offsets
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mm[base + offsets[mid] : base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and mm[base + offsets[lo] : base + offsets[lo + 1]] == key:
+            return lo
+        return -1
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+class _MappedBundles(_MappedStrings):
+    # There are only a few hundred bundles, so decoded ones are kept and shared.
+    def __init__(self, mm: mmap.mmap, base: int, offsets: memoryview) -> None:
+        super(_MappedBundles, self).__init__(mm, base, offsets)
+        self.decoded: Dict[int, UmFeats] = {}
+
+    def __getitem__(self, i: int) -> UmFeats:  # type: ignore
+        try:
+            return self.decoded[i]
+        except KeyError:
+            feats = super(_MappedBundles, self).__getitem__(i).split(";")
+            bundle = self.decoded[i] = frozenset(map(UmFeat, feats))
+            return bundle
+
+
+class MappedLexicon:
+    """A `Lexicon` served from a memory-mapped index written by `build_index`.
+
+    Only the pages touched by lookups are resident, so very large lexicons
+    can be scored against on small machines.
+    """
+
+    def __init__(self, index_file: Path) -> None:
+        with open(index_file, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byte_order, *fields = _INDEX_HEADER.unpack_from(self._mm)
+        if magic != INDEX_MAGIC or byte_order != _BYTE_ORDER_MARK:
+            raise ValueError(f"{index_file} is not a lexicon index for this machine")
+        n_forms, _, _, _, self._bloom_bits, self._bloom_hashes, _ = fields[:7]
+        starts = dict(zip(_INDEX_SECTIONS, fields[7:]))
+        ends = dict(zip(_INDEX_SECTIONS, fields[8:] + [len(self._mm)]))
+        view = memoryview(self._mm)
+
+        def section(name: str, fmt: str, length: int) -> memoryview:
+            start = starts[name]
+            section = view[start : start + length * struct.calcsize(fmt)]
+            return section.cast(fmt)  # type: ignore
+
+        n_entries, n_bundles, n_lemmas = fields[1:4]
+        self._n_forms = n_forms
+        self._form_offsets = section("form_offsets", "Q", n_forms + 1)
+        self._entry_offsets = section("entry_offsets", "Q", n_forms + 1)
+        self._entry_bundles = section("entry_bundles", "I", n_entries)
+        self._entry_lemmas = section("entry_lemmas", "I", n_entries)
+        self._forms = _MappedStrings(self._mm, starts["forms"], self._form_offsets)
+        self.bundles = _MappedBundles(
+            self._mm, starts["bundles"], section("bundle_offsets", "Q", n_bundles + 1)
+        )
+        self.lemma_names = _MappedStrings(
+            self._mm, starts["lemmas"], section("lemma_offsets", "Q", n_lemmas + 1)
+        )
+        self._bloom = view[starts["bloom"] : starts["bloom"] + self._bloom_bits // 8]
+        source = bytes(self._mm[starts["source"] : ends["source"]]).rstrip(b"\0")
+        self.source: Dict[str, Any] = json.loads(source or b"{}")
+        self._last: Tuple[Optional[str], int] = (None, -1)
+        self.tags = _BundleView(self)
+        self.lemmas = _LemmaView(self)
+        self.joint = _JointView(self)
+        self._vocabulary: Optional[FeatureVocabulary] = None
+
+    @property
+    def vocabulary(self) -> FeatureVocabulary:
+        if self._vocabulary is None:
+            bundles = self.bundles
+            self._vocabulary = FeatureVocabulary(
+                bundles[i] for i in range(len(bundles))
+            )
+        return self._vocabulary
+
+    def _maybe_contains(self, key: bytes) -> bool:
+        bloom = self._bloom
+        return all(
+            bloom[pos >> 3] >> (pos & 7) & 1
+            for pos in _bloom_positions(key, self._bloom_bits, self._bloom_hashes)
+        )
+
+    def _find(self, form: str) -> int:
+        """The position of `form` among the sorted forms, or -1."""
+        last_form, last = self._last
+        if form == last_form:
+            return last
+        key = form.encode("utf-8")
+        found = -1
+        if not self._bloom_bits or self._maybe_contains(key):
+            found = self._forms.search(key)
+        self._last = (form, found)
+        return found
+
+    def _span(self, form: Form) -> Tuple[int, int]:
+        f = self._find(form) if isinstance(form, str) else -1
+        if f < 0:
+            raise KeyError(form)
+        return self._entry_offsets[f], self._entry_offsets[f + 1]
+
+    def bundle_ids(self, form: Form) -> memoryview:
+        start, end = self._span(form)
+        return self._entry_bundles[start:end]
+
+    def lemma_ids(self, form: Form) -> memoryview:
+        start, end = self._span(form)
+        return self._entry_lemmas[start:end]
+
+    def pair_bundle_ids(self, form: Form, lemma: Lemma) -> Sequence[int]:
+        """The IDs of the bundles attested for `form` with `lemma`."""
+        f = self._find(form) if isinstance(form, str) else -1
+        if f < 0:
+            return ()
+        lemma_id = self.lemma_names.search(lemma.encode("utf-8"))
+        if lemma_id < 0:
+            return ()
+        # A form's entries are sorted by lemma ID, so the pair's are adjacent.
+        start, end = self._entry_offsets[f], self._entry_offsets[f + 1]
+        start = bisect_left(self._entry_lemmas, lemma_id, start, end)
+        end = bisect_right(self._entry_lemmas, lemma_id, start, end)
+        return self._entry_bundles[start:end]
+
+    def __contains__(self, form: object) -> bool:
+        return isinstance(form, str) and self._find(form) >= 0
+
+    def __iter__(self) -> Iterator[Form]:
+        return (Form(self._forms[i]) for i in range(self._n_forms))
+
+    def __len__(self) -> int:
+        return self._n_forms
+
+
+def index_path(fname: Path, index_dir: Path) -> Path:
+    return _cache_file(fname, index_dir).with_suffix(".umidx")
+
+
+def update_index(
+    fname: Path, index_dir: Path, cache_dir: Optional[Path] = None
+) -> bool:
+    """(Re)build the index of a UniMorph file unless it is fresh; say if it was.
+
+    Building holds the whole lexicon in memory, so it is a separate, offline
+    step: `marry.py index`.
+    """
+    try:
+        if _is_fresh(fname, MappedLexicon(index_path(fname, index_dir)).source):
+            return False
+    except (OSError, ValueError, struct.error):
+        pass
+    build_index(load_lexicon(fname, cache_dir), index_path(fname, index_dir), fname)
+    return True
+
+
+def mapped_lexicon(fname: Path, index_dir: Path) -> MappedLexicon:
+    """Memory-map the index of a UniMorph file, built by `update_index`.
+
+    A missing or stale index is an error rather than rebuilt here: building it
+    would load the whole lexicon, which is what the index is there to avoid.
+    """
+    index_file = index_path(fname, index_dir)
+    try:
+        lexicon = MappedLexicon(index_file)
+    except (OSError, ValueError, struct.error) as e:
+        raise FileNotFoundError(
+            f"no usable index of {fname} in {index_dir}; run `marry.py index`"
+        ) from e
+    if not _is_fresh(fname, lexicon.source):
+        raise ValueError(f"the index of {fname} is stale; run `marry.py index`")
+    return lexicon
@@ -1,9 +1,20 @@
 import csv
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, FrozenSet, Iterable, NamedTuple, NewType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    NewType,
+    Tuple,
+)
 from collections.abc import Set
 
 from .paths import UD2UM_FILE
+from .streams import open_text
 
 
 Form = NewType("Form", str)
@@ -35,10 +46,31 @@ class UdTag(Set):
 
 
 def ud_iterator(file: Path) -> Iterable[str]:
-    with open(file, encoding="utf-8") as f:
+    with open_text(file) as f:
         yield from (line.strip() for line in f)
 
 
+def sentence_chunks(file: Path, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Split `file` into byte ranges of about `chunk_size` bytes.
+
+    Every range but the last ends just after a blank line, so no sentence is
+    split between two ranges.
+    """
+    size = file.stat().st_size
+    with open(file, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(start + chunk_size)
+            f.readline()  # Skip to the start of a line.
+            while True:
+                line = f.readline()
+                if not line.strip():
+                    break
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
 class CoNLLRow(NamedTuple):
     id: str
     form: Form
@@ -64,7 +96,9 @@ def is_conll_useless(line: str) -> bool:
     return False
 
 
-def _ud2um_mapping() -> Dict[UdFeat, UmFeat]:
+@lru_cache(maxsize=None)
+def load_ud2um_mapping() -> Dict[UdFeat, UmFeat]:
+    """Read `UD-UniMorph.tsv`, which ships next to this module, on first use."""
     ud2um = {}
     with open(UD2UM_FILE, encoding="utf-8") as f:
         reader = csv.DictReader(f, delimiter="\t")
@@ -72,8 +106,11 @@ def _ud2um_mapping() -> Dict[UdFeat, UmFeat]:
             ud = UdFeat(row["UD"])
             um = UmFeat(row["UniMorph"] or "_")
             ud2um[ud] = um
-    print(ud2um)
     return ud2um
 
 
-ud2um_mapping = _ud2um_mapping()
+def __getattr__(name: str) -> Any:
+    # `ud2um_mapping` is built when first asked for, not at import time.
+    if name == "ud2um_mapping":
+        return load_ud2um_mapping()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")